@@ -1,32 +1,54 @@
 # Imports
-from src.modules.bootTrainer import boot as bootTrainer
-from src.modules.bootDashboard import boot as bootDashboard
+from src.modules import bootTrainer, bootDashboard
 from src.modules.jpTrainerInit import init as jpTrainerInit
+from src.classes.ReviewScheduler import ReviewScheduler
+from src.classes.AttemptHistory import AttemptHistory
+from src.classes.InputRecorder import InputRecorder
+from src.classes.SampleStore import SampleStore
+from src.classes.SceneManager import SceneManager
 from src.classes.DataFile import DataFile
 from src.classes.Window import Window
+from src.modules.dictionary import STUDY_ITEMS
+import random
 
 # Main function
 def main():
 
     # Initializes data
-    settings = DataFile("data/settings.datcs")
+    settings = DataFile("data/settings.datcs", "data/annotatedSettings.datcs")
     if settings.get("initialBoot"): jpTrainerInit(settings)
     window = Window(settings, "Hiragana Trainer")
-    scene = "trainer"
-    running = True
+    window.assets.preload(bootTrainer.ASSETS + bootDashboard.ASSETS)
 
-    # Main program loop
-    while running:
+    # User's study data, shared with the scenes
+    stores = {
+        "history": AttemptHistory("data/history.db"),
+        "samples": SampleStore("data/samples"),
+        "reviews": ReviewScheduler("data/reviews.bin", len(STUDY_ITEMS), lambda: window.scheduler.now()),
+    }
 
-        # Loads trainer scene
-        if scene == "trainer":
-            running, scene = bootTrainer(window, settings)
-        
-        # Loads dashboard scene
-        elif scene == "dashboard":
-            running, scene = bootDashboard(window, settings)
+    # Records input with a known shuffle seed so the session can be replayed
+    if settings.get("recordInput"):
+        seed = random.randrange(2 ** 32)
+        random.seed(seed)
+        window.scheduler.recorder = InputRecorder("data/recording.jpir", seed, settings, stores["reviews"])
 
-    # Closes pygame
+    # Main program loop (Scenes stay alive between switches)
+    scenes = SceneManager(window, settings, stores,
+    {"trainer": bootTrainer, "dashboard": bootDashboard},
+    {"trainer": "dashboard", "dashboard": "trainer"})
+    scenes.run("trainer")
+    if window.scheduler.recorder is not None: window.scheduler.recorder.close()
+    settings.flush()
+    stores["history"].close()
+    stores["samples"].close()
+    stores["reviews"].save()
+
+    # Reports frame pacing, asset memory, stage timings and closes pygame
+    if settings.get("logStats"):
+        print(window.scheduler.summary())
+        print(window.assets.summary())
+    if settings.get("profilerLog"): window.profiler.dump("data/profile.csv")
     window.quit()
 
 # Main function call
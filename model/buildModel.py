@@ -1,23 +1,34 @@
 # Imports
-import itertools
 import numpy as npy
 import tensorflow as tf
-from matplotlib import pyplot as plt
 from PIL import Image, ImageFilter
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Conv2D, Dropout, Flatten, MaxPooling2D
-from keras import backend as back
-from random import randint
+from tensorflow.keras.layers import Dense, Conv2D, Dropout, Flatten, MaxPooling2D, SeparableConv2D, \
+BatchNormalization, Activation, GlobalAveragePooling2D
+from random import randint, Random
 from tensorflow import keras
-import japanize_matplotlib
-from sys import exit
-import pickle
+import concurrent.futures
+import multiprocessing
+import argparse
+import tempfile
+import hashlib
+import pathlib
+import shutil
+import json
+import time
+import sys
 import os
 import math
 
-BUILD_MODEL = True
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.classes.SampleStore import SampleStore
+from evaluateModel import evaluateModel, writeReport, plotReport, printReport, latencyOf
+import etlReader
+
+STREAM_DATA = True
 
 EPOCHS = 3
+BATCH_SIZE = 32
 TRAINING_SPLIT = 0.8
 INTERMEDIATE_LAYER = 800
 PARALLELISM = 10
@@ -26,428 +37,919 @@ GENERATION_FACTOR = 6
 MAX_MOVEMENT_FORCE = 5
 MAX_SKEW_FORCE = 5
 
+SEED = 0
+SHARD_VERSION = 1
+MODEL_SPECS = "models.json"
+BUILD_DIRECTORY = "build"
+CHECKPOINT_DIRECTORY = "checkpoints"
+SHARD_DIRECTORY = "shards"
+DATASET_DIRECTORY = "dataset"
+DATASET_FILES = ("trainImages.npy", "trainLabels.npy", "testImages.npy", "testLabels.npy")
+USER_SAMPLES = "../data/samples"
+IMAGE_DIRECTORY = "images"
+RECORD_DIRECTORY = "records"
+INDEX_PATH = "paths/images.index"
+INDEX_VERSION = 2
+PROMOTION_DIRECTORY = "."
+FINETUNE_DIRECTORY = "../data/finetune"
+PROMOTION_SPEEDUP = 0.9
+
+# Compact architectures as stride of the first convolution, filters of each separable block and units of the head
+COMPACT_ARCHITECTURES = {
+    "separableSmall": (2, (24, 48, 96), 128),
+    "separable": (1, (32, 64, 128), 256),
+    "separableDeep": (1, (32, 64, 128, 256), 256),
+}
+ARCHITECTURES = ["dense", *COMPACT_ARCHITECTURES]
+
+# Settings a model spec can change
+SPEC_DEFAULTS = {
+    "sets": ["N5KANJI"],
+    "architecture": "dense",
+    "intermediateLayer": INTERMEDIATE_LAYER,
+    "epochs": EPOCHS,
+    "batchSize": BATCH_SIZE,
+    "generationFactor": GENERATION_FACTOR,
+    "maxMovementForce": MAX_MOVEMENT_FORCE,
+    "maxSkewForce": MAX_SKEW_FORCE,
+    "trainingSplit": TRAINING_SPLIT,
+    "stream": STREAM_DATA,
+    "userSamples": False,
+    "userSamplesCorrectOnly": False,
+    "seed": SEED,
+}
+
 # Main function
 def main():
 
-    # Builds collection paths
-    paths = joinDictionaries([*buildPaths()])
-    trainImgs, trainLabels, testImgs, testLabels = handleData(paths)
+    arguments = parseArguments()
+
+    # Measures augmentation speed on synthetic images only
+    if arguments.benchmark_augmentation:
+        benchmarkAugmentation()
+        return
+
+    # Builds collection paths once for every model
+    specs = loadSpecs(arguments.spec, arguments.models, arguments.user_samples)
+    if arguments.architectures: specs = architectureVariants(specs, arguments.architectures)
+    paths = buildPaths()
+
+    # Compares each dataset against the float64 arrays it replaced
+    if arguments.benchmark_dataset:
+        for name, spec in specs.items():
+            handleData(paths, spec)
+            print(f"{name}:")
+            benchmarkDataset(spec["dataset"])
+        return
+
+    # Independent models are built in their own processes, sharing the shard cache
+    start = time.perf_counter()
+    reports = {}
+    jobs = min(arguments.jobs, len(specs))
+    if jobs == 1:
+        for name, spec in specs.items():
+            reports[name] = buildSpec(name, spec, paths, not arguments.restart, arguments.load, arguments.plot)
+    else:
+        for spec in specs.values():
+            spec["workers"] = max(1, PARALLELISM // jobs)
+            spec["threads"] = max(1, os.cpu_count() // jobs)
+
+        # Variants share a dataset, which is written once before they are built
+        datasets = {spec["dataset"]: spec for spec in specs.values()}
+        if len(datasets) < len(specs):
+            for spec in datasets.values(): handleData(paths, spec)
+
+        context = multiprocessing.get_context("spawn")
+        with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=context) as executor:
+            futures = {executor.submit(buildSpec, name, spec, paths, not arguments.restart, arguments.load,
+            arguments.plot): name
+            for name, spec in specs.items()}
+
+            # A failed model does not stop the others
+            for future in concurrent.futures.as_completed(futures):
+                try: reports[futures[future]] = future.result()
+                except Exception as exception: reports[futures[future]] = {"error": repr(exception)}
+
+    printReports(reports, time.perf_counter() - start)
+    if arguments.promote: promoteModels(specs, reports)
+
+# Reads command line arguments
+def parseArguments():
+
+    parser = argparse.ArgumentParser(description="Builds character recognition models from a spec file.")
+    parser.add_argument("models", nargs="*", help="models to build, every model in the spec file if none are given")
+    parser.add_argument("--spec", default=MODEL_SPECS, help="JSON file of model specs")
+    parser.add_argument("--jobs", type=int, default=1, help="models built at the same time")
+    parser.add_argument("--restart", action="store_true", help="ignores checkpoints of unfinished builds")
+    parser.add_argument("--load", action="store_true", help="evaluates built models instead of training them")
+    parser.add_argument("--plot", action="store_true", help="saves evaluation plots next to each model")
+    parser.add_argument("--user-samples", action="store_true",
+    help="also trains on the drawings kept by the app (%s)" % USER_SAMPLES)
+    parser.add_argument("--architectures", nargs="+", choices=ARCHITECTURES,
+    help="builds each model once per architecture")
+    parser.add_argument("--promote", action="store_true",
+    help="replaces used models with faster builds that are as accurate")
+    parser.add_argument("--benchmark-augmentation", action="store_true", help="measures augmentation speed")
+    parser.add_argument("--benchmark-dataset", action="store_true", help="compares dataset formats")
+    return parser.parse_args()
+
+# Reads model specs, filling missing settings from the file's defaults, then the built in ones
+def loadSpecs(path, names, userSamples=False):
+
+    with open(path, "r", encoding="utf-8") as file: data = json.load(file)
+    names = names or list(data["models"])
+    unknown = [name for name in names if name not in data["models"]]
+    if unknown: raise SystemExit(f"Unknown models: {', '.join(unknown)} (known: {', '.join(data['models'])})")
+
+    specs = {}
+    for name in names:
+        spec = {**SPEC_DEFAULTS, **data.get("defaults", {}), **data["models"][name]}
+        spec["characters"] = [character for characterSet in spec["sets"] for character in CHARACTER_SETS[characterSet]]
+        spec["model"] = name
+        spec.setdefault("output", os.path.join(BUILD_DIRECTORY, name))
+        spec["dataset"] = os.path.join(DATASET_DIRECTORY, name)
+        spec["checkpoint"] = os.path.join(CHECKPOINT_DIRECTORY, name)
+        if userSamples: spec["userSamples"] = True
+
+        # Drawings are only appended, so their count tells checkpoints when they changed
+        spec["userSampleCount"] = len(SampleStore(USER_SAMPLES)) if spec["userSamples"] else 0
+        specs[name] = spec
+
+    return specs
+
+# Expands each spec into one spec per architecture, sharing the model's dataset
+def architectureVariants(specs, architectures):
+
+    variants = {}
+    for name, spec in specs.items():
+        root, extension = os.path.splitext(spec["output"])
+        for architecture in architectures:
+            variant = f"{name}.{architecture}"
+            variants[variant] = {**spec, "architecture": architecture, "output": f"{root}.{architecture}{extension}",
+            "checkpoint": os.path.join(CHECKPOINT_DIRECTORY, variant)}
+
+    return variants
+
+# Hashes the settings and data a checkpoint's weights depend on (More epochs can still resume)
+def specDigest(spec):
+    relevant = {key: value for key, value in spec.items()
+    if (key in SPEC_DEFAULTS or key == "userSampleCount") and key != "epochs"}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+# Builds, trains and evaluates one model, returning its report (Runs in a worker process when building in parallel)
+def buildSpec(name, spec, paths, resume, load, plot):
+
+    if "threads" in spec: tf.config.threading.set_intra_op_parallelism_threads(spec["threads"])
+    timings = {}
+    start = time.perf_counter()
+
+    # Streamed data only stores base images and augments them while training
+    print(f"Preparing {name}...")
+    manifest = handleData(paths, spec)
+    trainImgs, trainLabels, testImgs, testLabels = openDataset(spec["dataset"])
+
+    # Batches are normalized as they are read, user drawings one store chunk at a time
+    if spec["stream"]:
+        trainData = streamDataset(trainImgs, trainLabels, True, spec)
+        if spec["userSamples"]: trainData = trainData.concatenate(streamUserDataset(spec))
+        trainData = trainData.prefetch(tf.data.AUTOTUNE)
+    else:
+        userSamples = streamUserSamples(USER_SAMPLES, spec["characters"], spec["userSamplesCorrectOnly"]) \
+        if spec["userSamples"] else []
+        trainData = DatasetSequence([(trainImgs, trainLabels), *((RowView(pixels, rows), labels)
+        for pixels, rows, labels in userSamples)], True, spec)
+    timings["data"] = time.perf_counter() - start
+
+    # Handles model creation, continuing from the last finished epoch
+    initialEpoch = 0
+    if load:
+        print(f"Loading {name}...")
+        model = keras.models.load_model(spec["output"])
+    else:
+        model = buildModel(len(spec["characters"]), spec)
+        if resume: initialEpoch = loadCheckpoint(model, spec)
+        model.fit(trainData, epochs = spec["epochs"], initial_epoch = initialEpoch,
+        callbacks = [Checkpoint(spec["checkpoint"], specDigest(spec))])
+        os.makedirs(os.path.dirname(spec["output"]) or ".", exist_ok=True)
+        model.save(spec["output"])
+    timings["train"] = time.perf_counter() - start - timings["data"]
+
+    # Evaluates model on the whole test split, saving the report next to it
+    print(f"Testing {name}...")
+    evaluation = evaluateModel(model, testImgs, testLabels, spec["characters"])
+    reportPath = os.path.normpath(spec["output"]) + ".evaluation.json"
+    writeReport(evaluation, reportPath)
+    if plot: plotReport(evaluation, testImgs, spec["characters"], os.path.splitext(reportPath)[0])
+    printReport(name, evaluation)
+    timings["evaluate"] = time.perf_counter() - start - timings["data"] - timings["train"]
+    timings["total"] = time.perf_counter() - start
+
+    return {"output": spec["output"], "characters": len(spec["characters"]), "train": manifest["train"],
+    "test": manifest["test"], "userSamples": spec["userSampleCount"], "resumedFrom": initialEpoch, "epochs": spec["epochs"], "loss": evaluation["loss"],
+    "accuracy": evaluation["accuracy"], "top5": evaluation["topK"][str(min(5, len(spec["characters"])))],
+    "parameters": evaluation["parameters"], "flops": evaluation["flops"], "latencyMs": latencyOf(evaluation),
+    "evaluation": reportPath, "timings": timings}
+
+# Prints per-model timings and saves them with the other results
+def printReports(reports, elapsed):
+
+    width = max(12, *(len(name) + 2 for name in reports))
+    print(f"\n{'model':<{width}}{'classes':>8}{'params':>9}{'MFLOPs':>9}{'accuracy':>10}{'top-5':>8}{'latency':>10}" +\
+    f"{'data':>9}{'train':>9}{'test':>9}{'total':>9}")
+    for name, report in reports.items():
+        if "error" in report:
+            print(f"{name:<{width}}failed: {report['error']}")
+            continue
+        timings = report["timings"]
+        print(f"{name:<{width}}{report['characters']:>8}{report['parameters'] / 1e6:>8.2f}M" +\
+        f"{report['flops'] / 1e6:>9.1f}" +\
+        f"{report['accuracy']:>10.4f}{report['top5']:>8.4f}{report['latencyMs']:>8.2f}ms{timings['data']:>8.1f}s" +\
+        f"{timings['train']:>8.1f}s{timings['evaluate']:>8.1f}s{timings['total']:>8.1f}s")
+    print(f"Finished in {elapsed:.1f}s")
+
+    os.makedirs(BUILD_DIRECTORY, exist_ok=True)
+    with open(os.path.join(BUILD_DIRECTORY, "report.json"), "w", encoding="utf-8") as file:
+        json.dump({"elapsed": elapsed, "models": reports}, file, indent=1)
+
+# Replaces used models with builds that predict a drawing faster without losing accuracy (Candidates and used models
+# are measured one after another on the same test split, as timings of parallel builds are not comparable)
+def promoteModels(specs, reports):
+
+    candidates = {}
+    for name, spec in specs.items():
+        if name in reports and "error" not in reports[name]: candidates.setdefault(spec["model"], []).append(name)
+
+    promotions = {}
+    for model, names in candidates.items():
+        spec = specs[names[0]]
+        testImgs, testLabels = openDataset(spec["dataset"])[2:]
+        destination = os.path.join(PROMOTION_DIRECTORY, model + os.path.splitext(spec["output"])[1])
+        results = {}
+
+        # Used model, which only counts if it predicts the same characters
+        incumbent = None
+        if os.path.exists(destination):
+            try: incumbent = keras.models.load_model(destination)
+            except Exception as exception:
+                print(f"{model}: used model could not be loaded ({exception!r}), keeping it")
+                continue
+            if incumbent.output_shape[-1] != len(spec["characters"]):
+                print(f"{model}: used model predicts {incumbent.output_shape[-1]} characters, " +\
+                f"not {len(spec['characters'])}, keeping it")
+                continue
+            results["incumbent"] = evaluateModel(incumbent, testImgs, testLabels, spec["characters"])
+
+        for name in names:
+            results[name] = evaluateModel(keras.models.load_model(specs[name]["output"]), testImgs, testLabels,
+            spec["characters"])
+
+        # Fastest build that is as accurate and clearly faster, or the most accurate build if there is no used model
+        if incumbent is None: chosen = max(names, key=lambda name: results[name]["accuracy"])
+        else:
+            eligible = [name for name in names if results[name]["accuracy"] >= results["incumbent"]["accuracy"]
+            and latencyOf(results[name]) < latencyOf(results["incumbent"]) * PROMOTION_SPEEDUP]
+            chosen = min(eligible, key=lambda name: latencyOf(results[name])) if eligible else None
+
+        print(f"\n{'candidate':<28}{'params':>9}{'MFLOPs':>9}{'accuracy':>10}{'latency':>10}")
+        for name, result in results.items():
+            print(f"{name:<28}{result['parameters'] / 1e6:>8.2f}M{result['flops'] / 1e6:>9.1f}" +\
+            f"{result['accuracy']:>10.4f}{latencyOf(result):>8.2f}ms")
+
+        if chosen is None: print(f"{model}: no build beats the used model, keeping it")
+        else:
+            replaceModel(specs[chosen]["output"], destination)
+            retireFineTuning(model)
+            print(f"{model}: promoted {chosen} to {destination}")
+
+        promotions[model] = {"promoted": chosen, "destination": destination, "results": {name: {key: result[key]
+        for key in ("parameters", "flops", "accuracy", "topK", "latency")} for name, result in results.items()}}
+
+    os.makedirs(BUILD_DIRECTORY, exist_ok=True)
+    with open(os.path.join(BUILD_DIRECTORY, "promotion.json"), "w", encoding="utf-8") as file:
+        json.dump(promotions, file, indent=1)
+
+# Copies a build over a used model, keeping the old one until the new one is in place
+def replaceModel(source, destination):
+
+    temporary, previous = destination + ".tmp", destination + ".old"
+    for path in (temporary, previous): removePath(path)
+    if os.path.isdir(source): shutil.copytree(source, temporary)
+    else: shutil.copy2(source, temporary)
+
+    if os.path.exists(destination): os.replace(destination, previous)
+    os.replace(temporary, destination)
+    removePath(previous)
+
+# Removes a file or folder if it exists
+def removePath(path):
+    if os.path.isdir(path): shutil.rmtree(path)
+    elif os.path.exists(path): os.remove(path)
+
+# Moves fine-tuned weights aside, as they hold every weight of the replaced model
+def retireFineTuning(model):
+    weights = os.path.join(FINETUNE_DIRECTORY, f"{model}.h5")
+    if os.path.exists(weights): os.replace(weights, os.path.join(FINETUNE_DIRECTORY, f"{model}.retired.h5"))
+
+# Saves weights after every epoch so an interrupted build can resume
+class Checkpoint(keras.callbacks.Callback):
+
+    # Constructor
+    def __init__(self, path, digest):
+        super().__init__()
+        self.path = path
+        self.digest = digest
+
+    # Replaces weights, then the state pointing at them
+    def on_epoch_end(self, epoch, logs=None):
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.model.save_weights(self.path + ".tmp.weights.h5")
+        os.replace(self.path + ".tmp.weights.h5", self.path + ".weights.h5")
+        with open(self.path + ".json.tmp", "w", encoding="utf-8") as file:
+            json.dump({"epoch": epoch + 1, "spec": self.digest}, file)
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+
+# Loads checkpoint weights made with the same spec, returning the epoch to continue from
+def loadCheckpoint(model, spec):
+
+    if not os.path.exists(spec["checkpoint"] + ".json"): return 0
+    with open(spec["checkpoint"] + ".json", "r", encoding="utf-8") as file: state = json.load(file)
+    if state["spec"] != specDigest(spec): return 0
+
+    model.load_weights(spec["checkpoint"] + ".weights.h5")
+    print(f"Resuming from epoch {state['epoch']}")
+    return min(state["epoch"], spec["epochs"])
+
+# Creates a model of the spec's architecture
+def buildModel(labelNum, spec):
+
+    if spec["architecture"] == "dense": model = denseModel(labelNum, spec["intermediateLayer"])
+    elif spec["architecture"] in COMPACT_ARCHITECTURES:
+        model = compactModel(labelNum, *COMPACT_ARCHITECTURES[spec["architecture"]])
+    else: raise ValueError(f"Unknown architecture {spec['architecture']} (known: {', '.join(ARCHITECTURES)})")
 
-    # Handles model creation
-    if BUILD_MODEL:
-        model = buildModel(max(trainLabels) + 1)
-        model.fit(x = trainImgs, y = trainLabels, epochs = EPOCHS)
-        model.save("build")
+    model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    return model
 
-        # Evaluates model
-        print("Testing model...")
-        model.evaluate(testImgs, testLabels)
-    else:
-        print("Loading model...")
-        model = keras.models.load_model("build")
-    
-    # Plots sample predictions
-    print("\nBuilding plot predictions...")
-    correctPredictions, incorrectPredictions = makePredictions(model, testImgs, testLabels)
-    plotPredictions(correctPredictions, incorrectPredictions, testImgs)
-    print()
+# Creates the original model, a single convolution flattened into large dense layers
+def denseModel(labelNum, intermediateLayer):
 
-# Plots set of correct and incorrect predictions
-def plotPredictions(correctPredictions, incorrectPredictions, testImgs):
-
-    characterMap = N5KANJI
-
-    # Creates 4X6 graph
-    fig, axes = plt.subplots(nrows=4, ncols=6, figsize=(12, 8))
-    for row in range(len(axes)):
-        for col in range(len(axes[row])):
-
-            # Correct predictions
-            if row < 2:
-                prediction = correctPredictions.pop(0)
-                character = characterMap[prediction[1]]
-                axes[row][col].set_title(f"Correct - A({character})")
-                
-            # incorrect prediction
-            else:
-                prediction = incorrectPredictions.pop(0)
-                characters = characterMap[prediction[1]], characterMap[prediction[2]]
-                axes[row][col].set_title(f"Incorrect - P({characters[0]}):A({characters[1]})")
-
-            # Removes axis and draws plot
-            imgIndex = prediction[0]
-            axes[row][col].imshow(testImgs[imgIndex].reshape(50, 50), cmap="Blues")
-            axes[row][col].axis('off')
-
-    fig.tight_layout()
-    plt.show()
-
-# Returns sample correct and incorrect predictions
-def makePredictions(model, testImgs, testLabels):
-
-    correctPredictions = []
-    incorrectPredictions = []
-
-    # Fetches set of 12 correctly predicted images
-    while len(correctPredictions) < 12:
-        imgIndex = randint(0, testImgs.shape[0])
-        prediction = model.predict(testImgs[imgIndex].reshape(1, 50, 50, 1))
-        if(prediction.argmax() == testLabels[imgIndex]):
-            correctPredictions.append([imgIndex, prediction.argmax()])
-    
-    # Fetches set of 12 incorrectly predicted images
-    while len(incorrectPredictions) < 12:
-        imgIndex = randint(0, testImgs.shape[0])
-        prediction = model.predict(testImgs[imgIndex].reshape(1, 50, 50, 1))
-        if(prediction.argmax() != testLabels[imgIndex]):
-            incorrectPredictions.append([imgIndex, prediction.argmax(), testLabels[imgIndex]])
-    
-    return correctPredictions, incorrectPredictions
-
-# Creates used model
-def buildModel(labelNum):
-
-    # Generates model
     model = Sequential()
     model.add(Conv2D(50, kernel_size=(3, 3), input_shape = (50, 50, 1)))
     model.add(MaxPooling2D(pool_size=(2, 2)))
     model.add(Flatten())
-    model.add(Dense(INTERMEDIATE_LAYER, activation=tf.nn.relu))
+    model.add(Dense(intermediateLayer, activation=tf.nn.relu))
     model.add(Dropout(0.2))
-    model.add(Dense(INTERMEDIATE_LAYER / 1.5, activation=tf.nn.relu))
+    model.add(Dense(int(intermediateLayer / 1.5), activation=tf.nn.relu))
     model.add(Dropout(0.2))
-    model.add(Dense(INTERMEDIATE_LAYER / 2, activation=tf.nn.relu))
+    model.add(Dense(int(intermediateLayer / 2), activation=tf.nn.relu))
     model.add(Dropout(0.2))
     model.add(Dense(labelNum, activation=tf.nn.softmax))
-    model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
 
     return model
 
-# Determines how to fetch model's data
-def handleData(paths):
+# Creates a compact model, pooling separable convolutions down to one value per filter so the head stays small
+def compactModel(labelNum, stride, filters, headUnits):
 
-    # Loads data if it exists
-    if os.path.exists("trainImgs.npy") and os.path.exists("trainLabels.npy") and \
-    os.path.exists("testImgs.npy") and os.path.exists("testLabels.npy"):
+    model = Sequential()
+    model.add(Conv2D(filters[0], kernel_size=(3, 3), strides=stride, padding="same", use_bias=False,
+    input_shape = (50, 50, 1)))
+    model.add(BatchNormalization())
+    model.add(Activation(tf.nn.relu))
+
+    # Each block halves the image (50, 25, 12, 6... or 25, 12, 6, 3... after a strided first convolution)
+    for filterNum in filters:
+        model.add(SeparableConv2D(filterNum, kernel_size=(3, 3), padding="same", use_bias=False))
+        model.add(BatchNormalization())
+        model.add(Activation(tf.nn.relu))
+        model.add(MaxPooling2D(pool_size=(2, 2)))
+
+    model.add(GlobalAveragePooling2D())
+    model.add(Dropout(0.2))
+    model.add(Dense(headUnits, activation=tf.nn.relu))
+    model.add(Dropout(0.2))
+    model.add(Dense(labelNum, activation=tf.nn.softmax))
 
-        print("Loading data...")
+    return model
 
-        # Training data
-        trainImgs = npy.load("trainImgs.npy")
-        trainLabels = npy.load("trainLabels.npy")
+# Determines how to fetch a model's data
+def handleData(paths, spec):
+
+    # Streamed data only stores base images and augments them while training
+    collection = spec["characters"]
+    permutations = 1 if spec["stream"] else spec["generationFactor"]
+    keys = [shardKey(character, paths[character], permutations, spec) for character in collection]
+
+    # Loads dataset if every character's inputs are unchanged
+    manifestPath = os.path.join(spec["dataset"], "manifest.json")
+    if os.path.exists(manifestPath):
+        with open(manifestPath, "r", encoding="utf-8") as file: manifest = json.load(file)
+        if [shard.get("key") for shard in manifest["shards"]] == keys:
+            print("Loading data...\n")
+            return manifest
+
+    # Rebuilds dataset, reusing characters found in the build cache
+    print("Building data...")
+    manifest = writeDataset(generateShards(collection, paths, keys, permutations, spec), permutations, spec)
+    evictShards(collection, keys)
+    print()
+    return manifest
+
+# Hashes everything a character's shard is built from (Folder listings, mtimes and augmentation parameters)
+def shardKey(character, folders, permutations, spec):
+
+    digest = hashlib.sha256(json.dumps([SHARD_VERSION, character, permutations, spec["maxMovementForce"],
+    spec["maxSkewForce"], spec["trainingSplit"], spec["seed"]], ensure_ascii=False).encode("utf-8"))
+
+    for folder in folders:
+
+        # Record files are identified by their own mtime and the records taken from them
+        if isinstance(folder, etlReader.RecordSource):
+            stat = os.stat(folder.path)
+            digest.update(f"{os.path.basename(folder.path)}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode("utf-8"))
+            digest.update(folder.records.astype("<i8").tobytes())
+            continue
+
+        with os.scandir(folder) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                stat = entry.stat()
+                digest.update(f"{entry.name}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode("utf-8"))
+
+    return digest.hexdigest()[:32]
+
+# Path of a cached shard, prefixed by its code point so old versions of a character can be found
+def shardPath(character, key): return os.path.join(SHARD_DIRECTORY, f"{ord(character):05x}.{key}.npz")
+
+# Generates shards for characters missing from the build cache in worker processes
+def generateShards(collection, paths, keys, permutations, spec):
+
+    os.makedirs(SHARD_DIRECTORY, exist_ok=True)
+    jobs = [(key, character, paths[character], permutations, spec) for key, character in zip(keys, collection)
+    if not os.path.exists(shardPath(character, key))]
+    print(f"Reusing {len(collection) - len(jobs)} cached characters, generating {len(jobs)}")
+
+    # Shards finish in any order
+    if jobs:
+        with multiprocessing.Pool(spec.get("workers", PARALLELISM)) as pool:
+            for jobNum, character in enumerate(pool.imap_unordered(generateShard, jobs), 1):
+                print(f"Generated {character} - {jobNum:04}/{len(jobs):04} ({jobNum/len(jobs) * 100:06.02f}%)")
+
+    # Labels follow the collection order, whichever run built each shard
+    shards = []
+    for label, (key, character) in enumerate(zip(keys, collection)):
+        with npy.load(shardPath(character, key)) as data: train, sources = data["train"], int(data["sources"])
+        shards.append({"label": label, "character": character, "key": key, "sources": sources,
+        "images": len(train), "train": int(train.sum()), "seed": spec["seed"] + ord(character)})
+
+    return shards
+
+# Generates permutations of one character into a uint8 shard (Runs in a worker process)
+def generateShard(job):
+
+    key, character, folders, permutationCount, spec = job
+    generator = Random(spec["seed"] + ord(character))
+
+    # Sources are extracted image files or records of raw ETL files
+    sources = []
+    for folder in folders:
+        if isinstance(folder, etlReader.RecordSource):
+            sources.extend((folder, recordNum) for recordNum in range(len(folder.records)))
+        else: sources.extend(os.path.join(folder, imageName) for imageName in sorted(os.listdir(folder))
+        if imageName != ".char.txt")
+
+    # Every permutation of a source image lands on the same side of the split
+    order = list(range(len(sources)))
+    generator.shuffle(order)
+    trainSources = set(order[:round(len(sources) * spec["trainingSplit"])])
+
+    images = []
+    train = []
+    decoded = {}
+    for sourceNum, source in enumerate(sources):
+
+        # Loads and normalizes image, decoding each record file's images once
+        if isinstance(source, str): image = Image.open(source, "r")
+        else:
+            recordSource, recordNum = source
+            if recordSource.path not in decoded: decoded[recordSource.path] = etlReader.readImages(recordSource)
+            image = Image.fromarray(decoded[recordSource.path][recordNum], "L")
+        image = image.filter(ImageFilter.GaussianBlur(radius=1))
+        image = image.resize((50, 50))
+        sharp = sharpenImage(image)
+
+        # Generates random image permutations
+        permutations = [sharp]
+        for _ in range(permutationCount - 1):
+
+            xMovement = generator.randint(-spec["maxMovementForce"], spec["maxMovementForce"])
+            yMovement = generator.randint(-spec["maxMovementForce"], spec["maxMovementForce"])
+            moved = moveImage(sharp, xMovement, yMovement, 255)
+
+            skewForce = generator.randint(-spec["maxSkewForce"], spec["maxSkewForce"])
+            skewed = sharpenImage(skewImage(moved, skewForce, 255, "EXTRA_SMOOTH"))
+            permutations.append(skewed)
+
+        for permutation in permutations:
+            images.append(npy.asarray(permutation, dtype=npy.uint8))
+            train.append(sourceNum in trainSources)
+
+    # Shard only appears under its key once it is complete
+    temporary = shardPath(character, key) + ".tmp"
+    with open(temporary, "wb") as file:
+        npy.savez(file, images=npy.array(images, dtype=npy.uint8).reshape(-1, 50, 50),
+        train=npy.array(train, dtype=bool), sources=len(sources))
+    os.replace(temporary, shardPath(character, key))
+    return character
+
+# Removes cached shards of current characters whose inputs have since changed
+def evictShards(collection, keys):
+
+    current = {f"{ord(character):05x}": key for character, key in zip(collection, keys)}
+    evicted = 0
+    for entry in os.scandir(SHARD_DIRECTORY):
+        codePoint, key = entry.name.split(".")[:2]
+        if codePoint in current and key != current[codePoint]:
+            os.remove(entry.path)
+            evicted += 1
+    if evicted: print(f"Evicted {evicted} stale cached characters")
+
+# Joins shards into uint8 image and int16 label files through memory maps
+def writeDataset(shards, permutations, spec):
+
+    directory = spec["dataset"]
+    os.makedirs(directory, exist_ok=True)
+    counts = {"train": sum(shard["train"] for shard in shards)}
+    counts["test"] = sum(shard["images"] for shard in shards) - counts["train"]
+
+    # Files are allocated at full size and filled one shard at a time
+    files = {}
+    for split, count in counts.items():
+        files[split] = (
+            npy.lib.format.open_memmap(os.path.join(directory, f"{split}Images.npy"), "w+", npy.uint8,
+            (count, 50, 50)),
+            npy.lib.format.open_memmap(os.path.join(directory, f"{split}Labels.npy"), "w+", npy.int16,
+            (count, ))
+        )
+
+    offsets = dict.fromkeys(counts, 0)
+    for shard in shards:
+        with npy.load(shardPath(shard["character"], shard["key"])) as data: images, train = data["images"], data["train"]
+        for split, mask in (("train", train), ("test", ~train)):
+            start, end = offsets[split], offsets[split] + mask.sum()
+            files[split][0][start:end] = images[mask]
+            files[split][1][start:end] = shard["label"]
+            offsets[split] = end
+
+    for images, labels in files.values():
+        images.flush()
+        labels.flush()
+    del files
+
+    # Manifest is replaced last so a partial dataset is never loaded
+    manifest = {
+        "version": 1,
+        "characters": [shard["character"] for shard in shards],
+        "permutations": permutations,
+        "generationFactor": spec["generationFactor"],
+        "maxMovementForce": spec["maxMovementForce"],
+        "maxSkewForce": spec["maxSkewForce"],
+        "trainingSplit": spec["trainingSplit"],
+        "seed": spec["seed"],
+        "train": counts["train"],
+        "test": counts["test"],
+        "files": list(DATASET_FILES),
+        "shards": shards,
+    }
+    temporary = os.path.join(directory, "manifest.json.tmp")
+    with open(temporary, "w", encoding="utf-8") as file: json.dump(manifest, file, ensure_ascii=False, indent=1)
+    os.replace(temporary, os.path.join(directory, "manifest.json"))
+    return manifest
+
+# Opens dataset files as read-only memory maps
+def openDataset(directory):
+    return [npy.load(os.path.join(directory, name), mmap_mode="r") for name in DATASET_FILES]
+
+# Converts a uint8 batch into model input
+def normalizeBatch(images, labels):
+    return tf.cast(images, tf.float32)[..., None] / 255, tf.cast(labels, tf.int32)
+
+# Keras sequence that reads and normalizes one batch at a time from memory-mapped parts
+class DatasetSequence(keras.utils.Sequence):
+
+    # Constructor
+    def __init__(self, parts, shuffle, spec):
+
+        super().__init__()
+        self.parts = parts
+        self.shuffle = shuffle
+        self.batchSize = spec["batchSize"]
+        self.offsets = npy.cumsum([0] + [len(labels) for _, labels in parts])
+        self.order = npy.arange(self.offsets[-1])
+        self.generator = npy.random.default_rng(spec["seed"])
+        self.on_epoch_end()
+
+    # Number of batches
+    def __len__(self): return math.ceil(len(self.order) / self.batchSize)
+
+    # Gathers a batch, reading each part in ascending order
+    def __getitem__(self, batchNum):
+
+        indices = npy.sort(self.order[batchNum * self.batchSize:(batchNum + 1) * self.batchSize])
+        owners = npy.searchsorted(self.offsets, indices, "right") - 1
+        images, labels = [], []
+        for owner in npy.unique(owners):
+            rows = indices[owners == owner] - self.offsets[owner]
+            images.append(self.parts[owner][0][rows])
+            labels.append(self.parts[owner][1][rows])
+
+        return npy.concatenate(images)[..., None].astype(npy.float32) / 255, npy.concatenate(labels).astype(npy.int32)
+
+    # Reshuffles training data
+    def on_epoch_end(self):
+        if self.shuffle: self.generator.shuffle(self.order)
+
+# Rows of a memory-mapped chunk, read only when a batch needs them
+class RowView:
+
+    # Constructor
+    def __init__(self, array, rows):
+        self.array = array
+        self.rows = rows
+
+    # Number of rows
+    def __len__(self): return len(self.rows)
+
+    # Reads the given rows
+    def __getitem__(self, rows): return self.array[self.rows[rows]]
+
+# Builds a pipeline that reads and augments base images as they are batched
+def streamDataset(images, labels, train, spec):
+
+    # Only indices are shuffled, images are read from the memory-mapped dataset when they are augmented
+    dataset = tf.data.Dataset.range(len(labels))
+
+    # Training sees fresh permutations each epoch, testing always sees the same ones
+    if train:
+        dataset = dataset.shuffle(len(labels), seed=spec["seed"], reshuffle_each_iteration=True)
+        seeds = tf.data.Dataset.random(seed=spec["seed"])
+    else: seeds = tf.data.Dataset.counter()
+
+    # Each base image stands in for the permutations a full dataset would have stored
+    dataset = tf.data.Dataset.zip((dataset.repeat(spec["generationFactor"]), seeds))
+    dataset = dataset.map(lambda index, seed: augmentSample(images, labels, index, seed, spec),
+    num_parallel_calls=tf.data.AUTOTUNE, deterministic=not train)
+
+    # Normalizes whole batches rather than single images
+    return dataset.batch(spec["batchSize"]).map(normalizeBatch, num_parallel_calls=tf.data.AUTOTUNE)
+
+# Reads and augments one sample as a graph operation (Holds the GIL, so parallel calls overlap only in PIL and I/O)
+def augmentSample(images, labels, index, seed, spec):
+
+    augmented, label = tf.numpy_function(lambda index, seed: (augmentImage(npy.asarray(images[index]), seed, spec),
+    labels[index]), [index, seed], (tf.uint8, tf.int16))
+    augmented.set_shape((50, 50))
+    label.set_shape(())
+    return augmented, label
+
+# Applies one random permutation to a base image, or keeps it as it is
+def augmentImage(image, seed, spec):
+
+    generator = Random(int(seed))
+    if generator.randrange(spec["generationFactor"]) == 0: return image
+
+    xMovement = generator.randint(-spec["maxMovementForce"], spec["maxMovementForce"])
+    yMovement = generator.randint(-spec["maxMovementForce"], spec["maxMovementForce"])
+    moved = moveImage(Image.fromarray(image, "L"), xMovement, yMovement, 255)
+
+    skewForce = generator.randint(-spec["maxSkewForce"], spec["maxSkewForce"])
+    skewed = sharpenImage(skewImage(moved, skewForce, 255, "EXTRA_SMOOTH"))
+    return npy.asarray(skewed, dtype=npy.uint8)
 
-        # Testing data
-        testImgs = npy.load("testImgs.npy")
-        testLabels = npy.load("testLabels.npy")
+# Yields each store chunk with the rows of its drawings of the collection, labeled with the character asked for
+# (Misread drawings are kept unless correctOnly is set, they are the handwriting the model has to learn)
+def streamUserSamples(directory, collection, correctOnly=False):
 
-    # Builds data if it does not exist
-    else:
-        print("Building data...")
-        trainImgs, trainLabels, testImgs, testLabels = generateData(paths)
+    store = SampleStore(directory)
+    lookup = {ord(character): characterNum for characterNum, character in enumerate(collection)}
+    codes = npy.array(list(lookup), dtype=npy.uint32)
 
-    print()
-    return trainImgs, trainLabels, testImgs, testLabels
-
-# Generates data used to train the model
-def generateData(paths):
-
-    # Initializes data
-    trainImgs = []
-    testImgs = []
-    trainLabels = []
-    testLabels = []
-
-    # Loops over characters and images
-    # collection = HIRAGANA + KATAKANA + N5KANJI + N4KANJI + N3KANJI + N2KANJI + N1KANJI
-    collection = N5KANJI
-    imageCount = 0
-    for characterNum, character in enumerate(collection):
-        print(f"Generating {character} - {characterNum + 1:04}/{len(collection):04} " +\
-        f"({(characterNum + 1)/len(collection) * 100:06.02f}%)")
-        for folder in paths[character]:
-            for imageName in os.listdir(folder)[1:]:
-
-                # Loads and normalizes image
-                imagePath = folder + f"\{imageName}"
-                image = Image.open(imagePath, "r")
-                image = image.filter(ImageFilter.GaussianBlur(radius=1))
-                image = image.resize((50, 50))
-                sharp = sharpenImage(image)
-
-                # Generates random image permutations
-                permutations = [sharp]
-                for _ in range(GENERATION_FACTOR - 1):
-
-                    xMovement = randint(-MAX_MOVEMENT_FORCE, MAX_MOVEMENT_FORCE)
-                    yMovement = randint(-MAX_MOVEMENT_FORCE, MAX_MOVEMENT_FORCE)
-                    moved = moveImage(sharp, xMovement, yMovement, 255)
-
-                    skewForce = randint(-MAX_SKEW_FORCE, MAX_SKEW_FORCE)
-                    skewed = sharpenImage(skewImage(moved, skewForce, 255, "EXTRA_SMOOTH"))
-                    permutations.append(skewed)
-
-                # Gets pixel data
-                for permutation in permutations:
-
-                    # Determines if image should be used for testing or training
-                    target = "TEST"
-                    if imageCount % 10 < TRAINING_SPLIT * 10:
-                        target = "TRAIN"
-
-                    imageData = npy.array(permutation.getdata()).reshape((*permutation.size, 1)) / 255
-
-                    # Saves for training
-                    if target == "TEST":
-                        testImgs.append(imageData)
-                        testLabels.append(characterNum)
-
-                    elif target == "TRAIN":
-                        trainImgs.append(imageData)
-                        trainLabels.append(characterNum)
-                    
-                    imageCount += 1
-
-    # Converts data to numpy
-    trainImgs = npy.array(trainImgs)
-    testImgs = npy.array(testImgs)
-    trainLabels = npy.array(trainLabels)
-    testLabels = npy.array(testLabels)
-
-    # Saves fetched data
-    npy.save("trainImgs", trainImgs)
-    npy.save("trainLabels", trainLabels)
-    npy.save("testImgs", testImgs)
-    npy.save("testLabels", testLabels)
-
-    # Returns finalized data
-    return trainImgs, trainLabels, testImgs, testLabels
+    for pixels, index in store.chunks():
+        keep = npy.isin(index["label"], codes)
+        if correctOnly: keep &= index["correct"] == 1
+        rows = npy.flatnonzero(keep)
+        if not len(rows): continue
+        yield pixels, rows, npy.array([lookup[code] for code in index["label"][rows]], dtype=npy.int16)
+
+# Batches user drawings, reading the store again one chunk at a time every epoch
+def streamUserDataset(spec):
+
+    chunks = lambda: ((pixels[rows], labels) for pixels, rows, labels in
+    streamUserSamples(USER_SAMPLES, spec["characters"], spec["userSamplesCorrectOnly"]))
+    dataset = tf.data.Dataset.from_generator(chunks, output_signature=(
+    tf.TensorSpec((None, *SampleStore.SHAPE), tf.uint8), tf.TensorSpec((None,), tf.int16)))
+    return dataset.unbatch().batch(spec["batchSize"]).map(normalizeBatch)
 
 # Lossy noise reduction function
 def sharpenImage(image):
 
     # Generates sharp edges image
     sharp = image.filter(ImageFilter.EDGE_ENHANCE_MORE)
-    sharpData = sharp.load()
+    sharpData = npy.asarray(sharp)
 
     # Finds average background noise
-    noise = max(max(max(
-        npy.average(sharp.crop((0, 0, 3, 3)).getdata()),
-        npy.average(sharp.crop((46, 46, 49, 49)).getdata())),
-        npy.average(sharp.crop((0, 46, 3, 49)).getdata())),
-        npy.average(sharp.crop((46, 0, 49, 3)).getdata())
+    noise = max(
+        sharpData[0:3, 0:3].mean(),
+        sharpData[46:49, 46:49].mean(),
+        sharpData[46:49, 0:3].mean(),
+        sharpData[0:3, 46:49].mean()
     )
-    
+
     # Removes noise
-    for x in range(image.size[0]):
-        for y in range(image.size[1]):
-            if abs(sharpData[x, y] - noise) < 60: sharpData[x, y] = 255
+    cleaned = sharpData.copy()
+    cleaned[npy.abs(sharpData - noise) < 60] = 255
 
     # Finalizes smooth letter rendering
-    return sharp.filter(ImageFilter.SMOOTH)
+    return Image.fromarray(cleaned, "L").filter(ImageFilter.SMOOTH)
 
 # Moves image by given x and y
 def moveImage(image, x, y, fillColor):
 
     width, height = image.size
-    moved = Image.new('L', (width, height))
-    movedData = moved.load()
-
-    # loops over image
-    for col in range(width):
-        for row in range(height):
-
-            # Moves pixel
-            imagePixel = image.getpixel((col, row))
-            newCol = col + x
-            newRow = row + y
-
-            # Attaches moved pixel
-            if newCol >= 0 and newCol < width and newRow >= 0 and newRow < height:
-                moved.putpixel((newCol, newRow), imagePixel)
-
-            # Fills x movement
-            if x > 0 and col < x:
-                movedData[col, row] = fillColor
-            if x < 0 and col >= width + x:
-                movedData[col, row] = fillColor
-            
-            # Fills y movement
-            if y > 0 and row < y:
-                movedData[col, row] = fillColor
-            if y < 0 and row >= height + y:
-                movedData[col, row] = fillColor
-
-    return moved
+    imageData = npy.asarray(image)
+    moved = npy.full((height, width), fillColor, dtype=npy.uint8)
+
+    # Copies the overlapping window, everything uncovered keeps the fill color
+    if abs(x) < width and abs(y) < height:
+        moved[max(y, 0):height + min(y, 0), max(x, 0):width + min(x, 0)] = \
+        imageData[max(-y, 0):height - max(y, 0), max(-x, 0):width - max(x, 0)]
+
+    return Image.fromarray(moved, "L")
 
 # Skews an image by the given intensity
 def skewImage(image, intensity, fillColor, filtering="NONE"):
 
-    # Generates new image to be returned
     width, height = image.size
-    skewed = Image.new('L', (width, height))
+    imageData = npy.asarray(image)
 
-    # Fetches pixel data
-    imageData = image.load()
-    skewedData = skewed.load()
+    # Offsets only depend on the other axis, computed with math for the same rounding as before
+    xOffsets = npy.array([int(intensity * math.sin(2 * math.pi * y / (width * 1.25))) for y in range(height)])
+    yOffsets = npy.array([int(intensity * math.cos(2 * math.pi * x / (height * 1.25))) for x in range(width)])
 
-    mapped = [[0 for col in range(width)] for row in range(height)]
+    # Source pixels in the original column-major visiting order
+    x, y = npy.meshgrid(npy.arange(width), npy.arange(height), indexing="ij")
+    x, y = x.ravel(), y.ravel()
+    newX, newY = x + xOffsets[y], y + yOffsets[x]
 
-    # loops over pixels
-    for x, y in itertools.product(range(width), range(height)):
+    # Pixels pushed past the right or bottom edge are dropped, negative ones wrap around
+    inside = (newX < width) & (newY < height)
+    x, y, newX, newY = x[inside], y[inside], newX[inside] % width, newY[inside] % height
 
-        # Get the new x and y
-        newX = x + int(intensity * math.sin(2 * math.pi * y / (width * 1.25)))
-        newY = y + int(intensity * math.cos(2 * math.pi * x / (height * 1.25)))
+    # When pixels collide the last one visited wins
+    targets = newY * width + newX
+    _, lastVisited = npy.unique(targets[::-1], return_index=True)
+    lastVisited = len(targets) - 1 - lastVisited
 
-        if newX < width and newY < height:
-            skewedData[newX, newY] = imageData[x, y]
-            mapped[newY][newX] = 1
-    
-    for row in range(height):
-        for col in range(width):
-            if mapped[row][col] == 0:
-                skewedData[col, row] = fillColor
+    skewed = npy.full(height * width, fillColor, dtype=npy.uint8)
+    skewed[targets[lastVisited]] = imageData[y[lastVisited], x[lastVisited]]
+    skewed = Image.fromarray(skewed.reshape(height, width), "L")
 
     # Return the new image
     if filtering=="SMOOTH": skewed = skewed.filter(ImageFilter.SMOOTH)
     elif filtering=="EXTRA_SMOOTH": skewed = skewed.filter(ImageFilter.SMOOTH_MORE)
     return skewed
 
-# Joins multiple dictionaries
-def joinDictionaries(dictionaries):
-
-    joined = {}
-    for dictionary in dictionaries:
-        joined.update(dictionary)
-    return joined
-
-# Determines paths to find
+# Prints how many augmented images per second generateData can produce
+def benchmarkAugmentation(sampleCount=100):
+
+    # Synthetic strokes on a noisy light background
+    generator = npy.random.default_rng(0)
+    images = []
+    for _ in range(sampleCount):
+        data = generator.integers(220, 250, (50, 50), dtype=npy.uint8)
+        for _ in range(4):
+            x, y = generator.integers(5, 40, 2)
+            data[y:y + generator.integers(3, 12), x:x + generator.integers(2, 20)] = generator.integers(0, 80)
+        images.append(Image.fromarray(data, "L").filter(ImageFilter.GaussianBlur(radius=1)))
+
+    # Same permutations as generateData
+    start = time.perf_counter()
+    for image in images:
+        sharp = sharpenImage(image)
+        for _ in range(GENERATION_FACTOR - 1):
+            moved = moveImage(sharp, randint(-MAX_MOVEMENT_FORCE, MAX_MOVEMENT_FORCE),
+            randint(-MAX_MOVEMENT_FORCE, MAX_MOVEMENT_FORCE), 255)
+            sharpenImage(skewImage(moved, randint(-MAX_SKEW_FORCE, MAX_SKEW_FORCE), 255, "EXTRA_SMOOTH"))
+
+    elapsed = time.perf_counter() - start
+    print(f"{sampleCount * GENERATION_FACTOR / elapsed:.1f} images/sec")
+
+# Compares size and load time of the dataset against the float64 arrays it replaced
+def benchmarkDataset(directory):
+
+    trainImgs, trainLabels, testImgs, testLabels = openDataset(directory)
+    with tempfile.TemporaryDirectory() as legacyDirectory:
+
+        # Writes old format files a block at a time
+        legacyFiles = []
+        for name, array, shape, dtype in (("trainImgs.npy", trainImgs, (-1, 50, 50, 1), float),
+        ("trainLabels.npy", trainLabels, (-1, ), int), ("testImgs.npy", testImgs, (-1, 50, 50, 1), float),
+        ("testLabels.npy", testLabels, (-1, ), int)):
+            path = os.path.join(legacyDirectory, name)
+            legacy = npy.lib.format.open_memmap(path, "w+", dtype, (len(array), *shape[1:]))
+            for start in range(0, len(array), 4096):
+                block = array[start:start + 4096].reshape(shape)
+                legacy[start:start + 4096] = block / 255 if dtype is float else block
+            legacy.flush()
+            del legacy
+            legacyFiles.append(path)
+
+        # Old loader reads everything into memory up front
+        start = time.perf_counter()
+        legacyArrays = [npy.load(path) for path in legacyFiles]
+        legacyLoad = time.perf_counter() - start
+        del legacyArrays
+        legacySize = sum(os.path.getsize(path) for path in legacyFiles)
+
+    # New loader maps the files and normalizes batches as they are read
+    start = time.perf_counter()
+    sequence = DatasetSequence([openDataset(directory)[:2]], False, SPEC_DEFAULTS)
+    sequence[0]
+    firstBatch = time.perf_counter() - start
+    for batchNum in range(1, len(sequence)): sequence[batchNum]
+    fullPass = time.perf_counter() - start
+    compactSize = sum(os.path.getsize(os.path.join(directory, name)) for name in DATASET_FILES)
+
+    print(f"float64 .npy: {legacySize / 2**20:9.1f} MB, {legacyLoad:.3f}s to load")
+    print(f"uint8 memmap: {compactSize / 2**20:9.1f} MB, {firstBatch:.3f}s to first batch, " +\
+    f"{fullPass:.3f}s for every training batch")
+
+# Maps every character to its ETL folders and records, rescanning only what changed since the last run
 def buildPaths():
 
-    # Finds hiragana paths
-    print("Fetching hiragana paths...")
-    if os.path.exists("paths/hiragana.path"):
-
-        # Loads existing paths
-        with open("paths/hiragana.path", "rb") as f:
-            hiraganaPaths = pickle.load(f)
-    else:
-
-        # Saves fetched paths
-        hiraganaPaths = findPaths(HIRAGANA)
-        with open("paths/hiragana.path", "wb") as f:
-            pickle.dump(hiraganaPaths, f)
-    
-    # Finds katakana paths
-    print("Fetching katakana paths...")
-    if os.path.exists("paths/katakana.path"):
-
-        # Loads existing paths
-        with open("paths/katakana.path", "rb") as f:
-            katakanaPaths = pickle.load(f)
-    else:
-
-        # Saves fetched paths
-        katakanaPaths = findPaths(KATAKANA)
-        with open("paths/katakana.path", "wb") as f:
-            pickle.dump(katakanaPaths, f)
-    
-    # Finds n5 kanji paths
-    print("Fetching N5 kanji paths...")
-    if os.path.exists("paths/n5kanji.path"):
-
-        # Loads existing paths
-        with open("paths/n5kanji.path", "rb") as f:
-            n5kanjiPaths = pickle.load(f)
-    else:
-
-        # Saves fetched paths
-        n5kanjiPaths = findPaths(N5KANJI)
-        with open("paths/n5kanji.path", "wb") as f:
-            pickle.dump(n5kanjiPaths, f)
-
-    # Finds n4 kanji paths
-    print("Fetching N4 kanji paths...")
-    if os.path.exists("paths/n4kanji.path"):
-
-        # Loads existing paths
-        with open("paths/n4kanji.path", "rb") as f:
-            n4kanjiPaths = pickle.load(f)
-    else:
-
-        # Saves fetched paths
-        n4kanjiPaths = findPaths(N4KANJI)
-        with open("paths/n4kanji.path", "wb") as f:
-            pickle.dump(n4kanjiPaths, f)
-
-    # Finds n3 kanji paths
-    print("Fetching N3 kanji paths...")
-    if os.path.exists("paths/n3kanji.path"):
-
-        # Loads existing paths
-        with open("paths/n3kanji.path", "rb") as f:
-            n3kanjiPaths = pickle.load(f)
-    else:
-
-        # Saves fetched paths
-        n3kanjiPaths = findPaths(N3KANJI)
-        with open("paths/n3kanji.path", "wb") as f:
-            pickle.dump(n3kanjiPaths, f)
-    
-    # Finds n2 kanji paths
-    print("Fetching N2 kanji paths...")
-    if os.path.exists("paths/n2kanji.path"):
-
-        # Loads existing paths
-        with open("paths/n2kanji.path", "rb") as f:
-            n2kanjiPaths = pickle.load(f)
-    else:
+    print("Fetching paths...")
+    previous, previousRecords = loadIndex(INDEX_PATH)
+    collections = {}
+
+    # One pass over the images tree, reading each folder's .char.txt at most once
+    if os.path.isdir(IMAGE_DIRECTORY):
+        with os.scandir(IMAGE_DIRECTORY) as entries:
+            for collection in sorted(entries, key=lambda entry: entry.name):
+                if not collection.is_dir(): continue
+
+                # Collections whose folder list did not change are reused as they are
+                modified = collection.stat().st_mtime_ns
+                cached = previous.get(collection.name, {"modified": None, "folders": {}})
+                if cached["modified"] == modified:
+                    collections[collection.name] = cached
+                    continue
+
+                folders = {}
+                with os.scandir(collection.path) as characterFolders:
+                    for folder in characterFolders:
+                        if not folder.is_dir(): continue
+                        folderModified = folder.stat().st_mtime_ns
+                        character, cachedModified = cached["folders"].get(folder.name, (None, None))
+                        if cachedModified != folderModified:
+                            with open(os.path.join(folder.path, ".char.txt"), "r", encoding="utf-8") as file:
+                                character = file.readline().strip()
+                        folders[folder.name] = (character, folderModified)
+
+                collections[collection.name] = {"modified": modified, "folders": folders}
+
+    # Raw ETL record files are read directly, without extracting them first
+    recordSources, records = etlReader.indexRecords(RECORD_DIRECTORY, previousRecords)
+    if collections != previous or records != previousRecords: saveIndex(INDEX_PATH, collections, records)
+
+    # Inverts index, keeping collections and folders in name order
+    paths = {}
+    for collectionName, collection in collections.items():
+        for folderName, (character, _) in sorted(collection["folders"].items()):
+            paths.setdefault(character, []).append(pathlib.Path(IMAGE_DIRECTORY, collectionName, folderName))
+    for character, sources in recordSources.items():
+        paths.setdefault(character, []).extend(sources)
 
-        # Saves fetched paths
-        n2kanjiPaths = findPaths(N2KANJI)
-        with open("paths/n2kanji.path", "wb") as f:
-            pickle.dump(n2kanjiPaths, f)
-    
-    # Finds n1 kanji paths
-    print("Fetching N1 kanji paths...")
-    if os.path.exists("paths/n1kanji.path"):
-
-        # Loads existing paths
-        with open("paths/n1kanji.path", "rb") as f:
-            n1kanjiPaths = pickle.load(f)
-    else:
-
-        # Saves fetched paths
-        n1kanjiPaths = findPaths(N1KANJI)
-        with open("paths/n1kanji.path", "wb") as f:
-            pickle.dump(n1kanjiPaths, f)
-        
     print()
-    return hiraganaPaths, katakanaPaths, n5kanjiPaths, n4kanjiPaths, n3kanjiPaths, n2kanjiPaths, n1kanjiPaths
-
-# Finds character paths
-def findPaths(characterSet):
+    return paths
 
-    # loops over characters
-    collectionPaths = {}
+# Reads folder and record file index, returning nothing if it is missing or from another version
+def loadIndex(path):
 
-    # Loops over collections
-    for character in characterSet:
-        for collection in os.listdir("images"):
+    if not os.path.exists(path): return {}, {}
+    with open(path, "r", encoding="utf-8") as file: index = json.load(file)
+    if index.get("version") != INDEX_VERSION: return {}, {}
+    return {name: {"modified": collection["modified"], "folders": {folder: tuple(entry)
+    for folder, entry in collection["folders"].items()}} for name, collection in index["collections"].items()}, \
+    index["records"]
 
-            # Loops over characters in collection
-            for char in os.listdir(f"images\{collection}"):
-                with open(f"images\{collection}\{char}\.char.txt", "r", encoding="utf-8") as file:
+# Writes folder and record file index atomically
+def saveIndex(path, collections, records):
 
-                    # Determines if file holds character we are looking for
-                    read = file.readline()
-                    if read == character:
-                        if character in collectionPaths:
-                            collectionPaths[character].append(f"images\{collection}\{char}")
-                        else: collectionPaths[character] = [f"images\{collection}\{char}"]
-
-    # Returns collection of paths
-    return collectionPaths
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"version": INDEX_VERSION, "collections": collections, "records": records}, file,
+        ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporary, path)
 
 HIRAGANA_ALL = ['あ', 'い', 'う', 'え', 'お', 'か', 'き', 'く', 'け', 'こ', 'が', 'ぎ', 'ぐ', 'げ', 'ご', 'さ', 'し', 'す',
 'せ', 'そ', 'ざ', 'じ', 'ず', 'ぜ', 'ぞ', 'た', 'ち', 'つ', 'て', 'と', 'だ', 'ぢ', 'づ', 'で', 'ど', 'な', 'に', 'ぬ',
@@ -882,6 +1384,9 @@ N1KANJI_MAP = ['Street', 'Also', 'Hill', 'Rust Colored, Red', 'From', 'This', 'S
 KANJI = [N5KANJI, N4KANJI, N3KANJI, N2KANJI, N1KANJI]
 KANJI_MAP = [N5KANJI_MAP, N4KANJI_MAP, N3KANJI_MAP, N2KANJI_MAP, N1KANJI_MAP]
 
+CHARACTER_SETS = {"HIRAGANA": HIRAGANA, "KATAKANA": KATAKANA, "N5KANJI": N5KANJI, "N4KANJI": N4KANJI,
+"N3KANJI": N3KANJI, "N2KANJI": N2KANJI, "N1KANJI": N1KANJI}
+
 # Executes main function
 if __name__ == "__main__":
     main()
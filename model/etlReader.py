@@ -0,0 +1,121 @@
+# Imports
+from collections import namedtuple
+import numpy as npy
+import unicodedata
+import re
+import os
+
+# Record layout of an ETL file (Offsets in bytes, images are stored row by row without padding)
+RecordFormat = namedtuple("RecordFormat", ["recordSize", "labelOffset", "labelCode", "imageOffset", "width", "height",
+"depth", "hiragana", "header"])
+
+# Raw records of one file that hold a character
+RecordSource = namedtuple("RecordSource", ["path", "records"])
+
+FORMATS = {
+    "ETL1": RecordFormat(2052, 6, "JIS X 0201", 32, 64, 63, 4, False, False),
+    "ETL3": RecordFormat(2952, 9, "JIS X 0201", 216, 72, 76, 4, False, False),
+    "ETL4": RecordFormat(2952, 9, "JIS X 0201", 216, 72, 76, 4, True, False),
+    "ETL5": RecordFormat(2952, 9, "JIS X 0201", 216, 72, 76, 4, False, False),
+    "ETL6": RecordFormat(2052, 6, "JIS X 0201", 32, 64, 63, 4, False, False),
+    "ETL7": RecordFormat(2052, 6, "JIS X 0201", 32, 64, 63, 4, True, False),
+    "ETL8B": RecordFormat(512, 2, "JIS X 0208", 8, 64, 63, 1, False, True),
+    "ETL8G": RecordFormat(8199, 2, "JIS X 0208", 60, 128, 127, 4, False, False),
+    "ETL9B": RecordFormat(576, 2, "JIS X 0208", 8, 64, 63, 1, False, True),
+    "ETL9G": RecordFormat(8199, 2, "JIS X 0208", 64, 128, 127, 4, False, False),
+}
+
+# Finds format from an ETL file name (ETL1C_01, ETL7LC_1, ETL8B2C1, ETL9G_01...)
+def detectFormat(path):
+
+    match = re.match(r"ETL(\d+)([A-Z]?)", os.path.basename(path).upper())
+    if match is None: raise ValueError(f"{path} is not an ETL record file")
+    name = f"ETL{match[1]}{match[2]}" if match[1] in ("8", "9") else f"ETL{match[1]}"
+
+    # ETL2 labels are CO-59 codes, which need a conversion table
+    if name not in FORMATS: raise ValueError(f"{name} records are not supported, extract them to images instead")
+    return FORMATS[name]
+
+# Memory-maps a file as one row of bytes per record, skipping header records and trailing partial records
+def openRecords(path, recordFormat=None):
+
+    recordFormat = recordFormat or detectFormat(path)
+    count = os.path.getsize(path) // recordFormat.recordSize
+    if count == 0: return npy.zeros((0, recordFormat.recordSize), dtype=npy.uint8)
+    records = npy.memmap(path, npy.uint8, "r", shape=(count, recordFormat.recordSize))
+    return records[1:] if recordFormat.header else records
+
+# Converts a character code to the character it stands for
+def decodeCode(code, recordFormat):
+
+    if recordFormat.labelCode == "JIS X 0208":
+        try: return bytes([(code >> 8) | 0x80, (code & 0xFF) | 0x80]).decode("euc_jp")
+        except UnicodeDecodeError: return ""
+
+    # Half-width katakana become full-width, hiragana sets reuse the katakana codes
+    if 0xA1 <= code <= 0xDF: character = unicodedata.normalize("NFKC", chr(0xFF61 + code - 0xA1))
+    else: character = chr(code).strip()
+    if recordFormat.hiragana and "ァ" <= character <= "ヶ": character = chr(ord(character) - 0x60)
+    return character
+
+# Decodes labels of many records at once, converting each distinct code only once
+def decodeLabels(records, recordFormat):
+
+    offset = recordFormat.labelOffset
+    if recordFormat.labelCode == "JIS X 0208":
+        codes = records[:, offset].astype(npy.uint16) << 8 | records[:, offset + 1]
+    else: codes = npy.asarray(records[:, offset])
+
+    unique, inverse = npy.unique(codes, return_inverse=True)
+    characters = npy.array([decodeCode(int(code), recordFormat) for code in unique], dtype=object)
+    return characters[inverse.reshape(-1)]
+
+# Unpacks bit-packed images into white background uint8 images (Matches images extracted with the ETL tools)
+def decodeImages(records, recordFormat):
+
+    pixelCount = recordFormat.width * recordFormat.height
+    data = npy.asarray(records[:, recordFormat.imageOffset:recordFormat.imageOffset + pixelCount * recordFormat.depth // 8])
+
+    # Two pixels per byte, high nibble first
+    if recordFormat.depth == 4:
+        pixels = npy.stack((data >> 4, data & 0x0F), axis=-1).reshape(len(data), -1)
+        images = 255 - pixels * 16
+
+    # Eight pixels per byte, set bits are ink
+    else:
+        pixels = npy.unpackbits(data, axis=1)[:, :pixelCount]
+        images = 255 - pixels * 255
+
+    return images.astype(npy.uint8).reshape(len(data), recordFormat.height, recordFormat.width)
+
+# Decodes chosen records of a file
+def readImages(source):
+    recordFormat = detectFormat(source.path)
+    return decodeImages(openRecords(source.path, recordFormat)[source.records], recordFormat)
+
+# Maps every character to the records holding it across all record files in a directory
+# Labels of files whose size and modification time match the cache are reused instead of being read again
+def indexRecords(directory, cache=None):
+
+    cache = cache or {}
+    sources, files = {}, {}
+    if not os.path.isdir(directory): return sources, files
+
+    with os.scandir(directory) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            try: recordFormat = detectFormat(entry.name)
+            except ValueError: continue
+
+            stat = entry.stat()
+            cached = cache.get(entry.name, {})
+            if cached.get("modified") == stat.st_mtime_ns and cached.get("size") == stat.st_size: labels = cached["labels"]
+            else: labels = decodeLabels(openRecords(entry.path, recordFormat), recordFormat).tolist()
+            files[entry.name] = {"modified": stat.st_mtime_ns, "size": stat.st_size, "labels": labels}
+
+            labels = npy.array(labels, dtype=object)
+            order = npy.argsort(labels, kind="stable")
+            characters, starts = npy.unique(labels[order], return_index=True)
+            for character, records in zip(characters, npy.split(order, starts[1:])):
+                if character: sources.setdefault(character, []).append(RecordSource(entry.path, records))
+
+    return sources, files
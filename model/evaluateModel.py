@@ -0,0 +1,241 @@
+# Imports
+import numpy as npy
+import argparse
+import json
+import time
+import os
+
+# Runs the whole test set in batches, returning accuracy, confusion and latency figures
+def evaluateModel(model, images, labels, characters, batchSize=1024, topK=5, confusedPairs=20, examples=12, seed=0):
+
+    classCount = len(characters)
+    topK = min(topK, classCount)
+    labels = npy.asarray(labels, dtype=npy.int64)
+    confusion = npy.zeros((classCount, classCount), dtype=npy.int64)
+    topHits = npy.zeros(topK, dtype=npy.int64)
+    predicted = npy.empty(len(labels), dtype=npy.int64)
+    lossTotal = 0.0
+
+    # Memory-mapped uint8 images are normalized one batch at a time
+    for start in range(0, len(labels), batchSize):
+        batch = normalizeImages(images[start:start + batchSize])
+        batchLabels = labels[start:start + batchSize]
+        probabilities = npy.asarray(model.predict(batch, batch_size=batchSize, verbose=0))
+
+        # Rank of the right answer among the k best guesses
+        top = npy.argpartition(-probabilities, topK - 1, axis=1)[:, :topK]
+        top = npy.take_along_axis(top, npy.argsort(-npy.take_along_axis(probabilities, top, axis=1), axis=1), axis=1)
+        ranks = npy.argmax(top == batchLabels[:, None], axis=1)
+        found = (top == batchLabels[:, None]).any(axis=1)
+        topHits += npy.bincount(ranks[found], minlength=topK)
+
+        predicted[start:start + len(batchLabels)] = top[:, 0]
+        confusion += npy.bincount(batchLabels * classCount + top[:, 0], minlength=classCount ** 2).reshape(classCount, -1)
+        lossTotal -= npy.log(npy.clip(probabilities[npy.arange(len(batchLabels)), batchLabels], 1e-7, 1)).sum()
+
+    # Per-class accuracy, characters without test images are left out
+    counts = confusion.sum(axis=1)
+    classAccuracy = {characters[label]: float(confusion[label, label] / counts[label])
+    for label in range(classCount) if counts[label]}
+
+    # Off-diagonal cells with the most mistakes
+    mistakes = confusion.copy()
+    npy.fill_diagonal(mistakes, 0)
+    worst = npy.argsort(mistakes, axis=None)[::-1][:confusedPairs]
+    pairs = [{"actual": characters[actual], "predicted": characters[guess], "count": int(mistakes[actual, guess]),
+    "rate": float(mistakes[actual, guess] / counts[actual])}
+    for actual, guess in zip(*npy.unravel_index(worst, mistakes.shape)) if mistakes[actual, guess]]
+
+    # Sample correct and incorrect predictions for plotting, fewer if the model rarely gets one kind
+    generator = npy.random.default_rng(seed)
+    correct = npy.flatnonzero(predicted == labels)
+    incorrect = npy.flatnonzero(predicted != labels)
+    correct = npy.sort(generator.choice(correct, min(examples, len(correct)), replace=False))
+    incorrect = npy.sort(generator.choice(incorrect, min(examples, len(incorrect)), replace=False))
+
+    return {
+        "samples": int(len(labels)),
+        "classes": classCount,
+        "parameters": int(model.count_params()),
+        "flops": countFlops(model),
+        "accuracy": float(topHits[0] / max(len(labels), 1)),
+        "loss": float(lossTotal / max(len(labels), 1)),
+        "topK": {str(k): float(topHits[:k].sum() / max(len(labels), 1)) for k in range(1, topK + 1)},
+        "classAccuracy": classAccuracy,
+        "weakestClasses": sorted(classAccuracy.items(), key=lambda item: item[1])[:confusedPairs],
+        "confusedPairs": pairs,
+        "latency": measureLatency(model, images, batchSize),
+        "examples": {
+            "correct": [[int(index), characters[predicted[index]]] for index in correct],
+            "incorrect": [[int(index), characters[predicted[index]], characters[labels[index]]] for index in incorrect],
+        },
+        "confusion": confusion,
+    }
+
+# Converts uint8 images into model input (Already normalized images are passed through)
+def normalizeImages(images):
+    images = npy.asarray(images).reshape(-1, 50, 50, 1)
+    return images.astype(npy.float32) / 255 if images.dtype == npy.uint8 else images.astype(npy.float32)
+
+# Times single drawings the way Canvas predicts them, then full batches
+def measureLatency(model, images, batchSize, repeats=50, warmup=5):
+
+    import tensorflow as tf
+    single = normalizeImages(images[:1])
+    batch = normalizeImages(images[:batchSize])
+
+    # Single drawing through predict, and through the compiled call Canvas uses, without predict's setup
+    call = tf.function(lambda inputs: model(inputs, training=False))
+    timings = {"predict": [], "call": []}
+    for repeat in range(warmup + repeats):
+        start = time.perf_counter()
+        model.predict(single, verbose=0)
+        middle = time.perf_counter()
+        call(single)
+        end = time.perf_counter()
+        if repeat >= warmup:
+            timings["predict"].append((middle - start) * 1000)
+            timings["call"].append((end - middle) * 1000)
+
+    # Whole batches, reported per sample
+    model.predict(batch, batch_size=batchSize, verbose=0)
+    batchTimings = []
+    for _ in range(max(1, repeats // 10)):
+        start = time.perf_counter()
+        model.predict(batch, batch_size=batchSize, verbose=0)
+        batchTimings.append((time.perf_counter() - start) * 1000)
+
+    batchMs = float(npy.median(batchTimings))
+    return {
+        "singlePredictMs": percentiles(timings["predict"]),
+        "singleCallMs": percentiles(timings["call"]),
+        "batchSize": len(batch),
+        "batchMs": batchMs,
+        "batchedPerSampleMs": batchMs / len(batch),
+        "batchedSamplesPerSecond": len(batch) / batchMs * 1000,
+    }
+
+# Counts floating point operations of one prediction, two per multiply-add of convolution and dense layers
+def countFlops(model):
+
+    from tensorflow import keras
+    multiplyAdds = 0
+    for layer in model.layers:
+        outputShape = layer.output.shape
+        channels = layer.input.shape[-1]
+
+        # Separable convolutions filter each channel on its own, then mix channels per pixel
+        if isinstance(layer, keras.layers.SeparableConv2D):
+            pixels = outputShape[1] * outputShape[2]
+            kernel = layer.kernel_size[0] * layer.kernel_size[1]
+            multiplyAdds += pixels * (kernel * channels * layer.depth_multiplier +
+            channels * layer.depth_multiplier * outputShape[-1])
+        elif isinstance(layer, keras.layers.DepthwiseConv2D):
+            multiplyAdds += outputShape[1] * outputShape[2] * layer.kernel_size[0] * layer.kernel_size[1] * \
+            outputShape[-1]
+        elif isinstance(layer, keras.layers.Conv2D):
+            multiplyAdds += outputShape[1] * outputShape[2] * layer.kernel_size[0] * layer.kernel_size[1] * channels * \
+            outputShape[-1] // layer.groups
+        elif isinstance(layer, keras.layers.Dense): multiplyAdds += channels * outputShape[-1]
+
+    return int(multiplyAdds * 2)
+
+# Median time of one drawing through the compiled call Canvas predicts with
+def latencyOf(report): return report["latency"]["singleCallMs"]["p50"]
+
+# Median and tail of a list of timings
+def percentiles(values):
+    return {f"p{percentile}": float(npy.percentile(values, percentile)) for percentile in (50, 90, 99)}
+
+# Writes report as JSON, with the confusion matrix stored next to it
+def writeReport(report, path):
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    npy.save(os.path.splitext(path)[0] + ".confusion.npy", report["confusion"])
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({key: value for key, value in report.items() if key != "confusion"}, file, ensure_ascii=False, indent=1)
+
+# Saves sample predictions, most confused classes and per-class accuracy as images
+def plotReport(report, images, characters, directory):
+
+    from matplotlib import pyplot as plt
+    import japanize_matplotlib
+    os.makedirs(directory, exist_ok=True)
+
+    # Sample predictions, correct ones on the top rows
+    fig, axes = plt.subplots(nrows=4, ncols=6, figsize=(12, 8))
+    samples = [("Correct", example) for example in report["examples"]["correct"][:12]]
+    samples += [("Incorrect", example) for example in report["examples"]["incorrect"][:12]]
+    for axis, (kind, example) in zip(axes.ravel(), samples):
+        if kind == "Correct": axis.set_title(f"Correct - A({example[1]})")
+        else: axis.set_title(f"Incorrect - P({example[1]}):A({example[2]})")
+        axis.imshow(npy.asarray(images[example[0]]).reshape(50, 50), cmap="Blues")
+    for axis in axes.ravel(): axis.axis("off")
+    fig.tight_layout()
+    fig.savefig(os.path.join(directory, "examples.png"))
+    plt.close(fig)
+
+    # Confusion between the classes involved in the most mistakes
+    confusion = report["confusion"]
+    involved = []
+    for pair in report["confusedPairs"]:
+        for character in (pair["actual"], pair["predicted"]):
+            if characters.index(character) not in involved: involved.append(characters.index(character))
+    if involved:
+        fig, axis = plt.subplots(figsize=(10, 10))
+        axis.imshow(confusion[npy.ix_(involved, involved)], cmap="Blues")
+        axis.set_xticks(range(len(involved)), [characters[label] for label in involved])
+        axis.set_yticks(range(len(involved)), [characters[label] for label in involved])
+        axis.set_xlabel("Predicted")
+        axis.set_ylabel("Actual")
+        fig.tight_layout()
+        fig.savefig(os.path.join(directory, "confusion.png"))
+        plt.close(fig)
+
+    # Spread of per-class accuracy
+    fig, axis = plt.subplots(figsize=(8, 4))
+    axis.hist(list(report["classAccuracy"].values()), bins=20, range=(0, 1))
+    axis.set_xlabel("Accuracy")
+    axis.set_ylabel("Characters")
+    fig.tight_layout()
+    fig.savefig(os.path.join(directory, "classAccuracy.png"))
+    plt.close(fig)
+
+# Prints the headline figures of a report
+def printReport(name, report):
+
+    latency = report["latency"]
+    topK = ", ".join(f"top-{k} {accuracy:.4f}" for k, accuracy in report["topK"].items())
+    print(f"{name}: {report['samples']} test images, {topK}")
+    print(f"  {report['parameters']:,} parameters, {report['flops'] / 1e6:.1f} MFLOPs per drawing")
+    print(f"  batch 1: {latency['singlePredictMs']['p50']:.2f} ms predict, {latency['singleCallMs']['p50']:.2f} ms call, "
+    f"batch {latency['batchSize']}: {latency['batchedPerSampleMs']:.3f} ms per image")
+    for pair in report["confusedPairs"][:5]:
+        print(f"  {pair['actual']} read as {pair['predicted']} {pair['count']} times ({pair['rate']:.1%})")
+
+# Evaluates a saved model on a built dataset
+def main():
+
+    parser = argparse.ArgumentParser(description="Evaluates a saved model on the test split of a built dataset.")
+    parser.add_argument("model", help="saved model, for example hkModel")
+    parser.add_argument("dataset", help="dataset folder made by buildModel.py, for example dataset/hkModel")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--report", default=None, help="JSON report path, next to the model by default")
+    parser.add_argument("--plot", action="store_true", help="saves plots next to the report")
+    arguments = parser.parse_args()
+
+    from tensorflow import keras
+    model = keras.models.load_model(arguments.model)
+    with open(os.path.join(arguments.dataset, "manifest.json"), "r", encoding="utf-8") as file: manifest = json.load(file)
+    images = npy.load(os.path.join(arguments.dataset, "testImages.npy"), mmap_mode="r")
+    labels = npy.load(os.path.join(arguments.dataset, "testLabels.npy"), mmap_mode="r")
+
+    report = evaluateModel(model, images, labels, manifest["characters"], arguments.batch_size)
+    path = arguments.report or os.path.normpath(arguments.model) + ".evaluation.json"
+    writeReport(report, path)
+    if arguments.plot: plotReport(report, images, manifest["characters"], os.path.splitext(path)[0])
+    printReport(os.path.basename(os.path.normpath(arguments.model)), report)
+
+# Executes main function
+if __name__ == "__main__":
+    main()
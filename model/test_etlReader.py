@@ -0,0 +1,138 @@
+# Imports
+from etlReader import FORMATS, RecordSource, detectFormat, openRecords, decodeLabels, decodeImages, readImages, \
+indexRecords
+import numpy as npy
+import unicodedata
+import pytest
+import os
+
+# Characters each label code can hold (Hiragana sets store them as katakana codes)
+CHARACTERS = {
+    "JIS X 0201": ["A", "7", "ア", "カ", "ン"],
+    "JIS X 0208": ["あ", "ア", "日", "本", "語"],
+}
+HIRAGANA_CHARACTERS = ["あ", "か", "ん"]
+
+# Encodes a character as the label code of a format
+def encodeCode(character, recordFormat):
+
+    if recordFormat.labelCode == "JIS X 0208":
+        high, low = character.encode("euc_jp")
+        return (high & 0x7F) << 8 | low & 0x7F
+
+    # Kana are stored as half-width katakana
+    if recordFormat.hiragana and "ぁ" <= character <= "ゖ": character = chr(ord(character) + 0x60)
+    if character.isascii(): return ord(character)
+    halfWidth = next(code for code in range(0xFF61, 0xFFA0) if unicodedata.normalize("NFKC", chr(code)) == character)
+    return 0xA1 + halfWidth - 0xFF61
+
+# Builds a record file holding the given labels and ink levels (0 is background, 15 or 1 is full ink)
+def encodeRecords(recordFormat, characters, levels):
+
+    records = npy.zeros((len(characters) + recordFormat.header, recordFormat.recordSize), dtype=npy.uint8)
+    if recordFormat.header: records[0] = 0xFF
+
+    for record, character, image in zip(records[recordFormat.header:], characters, levels):
+        code = encodeCode(character, recordFormat) if character else 0x20
+        offset = recordFormat.labelOffset
+        if recordFormat.labelCode == "JIS X 0208": record[offset:offset + 2] = (code >> 8, code & 0xFF)
+        else: record[offset] = code
+
+        # Two pixels per byte, high nibble first, or eight per byte
+        if recordFormat.depth == 4: data = (image[..., 0::2] << 4 | image[..., 1::2]).reshape(-1)
+        else: data = npy.packbits(image.reshape(-1))
+        record[recordFormat.imageOffset:recordFormat.imageOffset + len(data)] = data
+
+    return records.tobytes()
+
+# Random ink levels for each record
+def randomLevels(recordFormat, count, seed=0):
+    generator = npy.random.default_rng(seed)
+    return generator.integers(0, 2 ** recordFormat.depth, (count, recordFormat.height, recordFormat.width), dtype=npy.uint8)
+
+# Characters a format is tested with
+def formatCharacters(recordFormat):
+    if recordFormat.hiragana: return HIRAGANA_CHARACTERS
+    return CHARACTERS[recordFormat.labelCode]
+
+# Writes a record file named after a format
+def writeRecords(directory, name, recordFormat, characters, levels):
+    path = os.path.join(directory, f"{name}C_01")
+    with open(path, "wb") as file: file.write(encodeRecords(recordFormat, characters, levels))
+    return path
+
+@pytest.mark.parametrize("name, expected", [("ETL1C_01", "ETL1"), ("ETL7LC_1", "ETL7"), ("ETL8B2C1", "ETL8B"),
+("ETL9G_01", "ETL9G"), ("etl4c_02", "ETL4")])
+def test_detectFormat(name, expected):
+    assert detectFormat(os.path.join("records", name)) is FORMATS[expected]
+
+@pytest.mark.parametrize("name", ["ETL2_1", "ETL10_1", "samples.u8"])
+def test_detectFormatRejects(name):
+    with pytest.raises(ValueError): detectFormat(name)
+
+@pytest.mark.parametrize("name", FORMATS)
+def test_roundTrip(tmp_path, name):
+
+    recordFormat = FORMATS[name]
+    characters = formatCharacters(recordFormat)
+    levels = randomLevels(recordFormat, len(characters))
+    path = writeRecords(tmp_path, name, recordFormat, characters, levels)
+
+    records = openRecords(path)
+    assert len(records) == len(characters)
+    assert decodeLabels(records, recordFormat).tolist() == characters
+
+    # Images are white background, darker with more ink
+    scale = 16 if recordFormat.depth == 4 else 255
+    expected = 255 - levels.astype(npy.int32) * scale
+    assert npy.array_equal(decodeImages(records, recordFormat), expected)
+    assert npy.array_equal(readImages(RecordSource(path, npy.array([2, 0]))), expected[[2, 0]])
+
+@pytest.mark.parametrize("name", FORMATS)
+def test_openRecordsSkipsPartialRecords(tmp_path, name):
+
+    recordFormat = FORMATS[name]
+    characters = formatCharacters(recordFormat)
+    path = writeRecords(tmp_path, name, recordFormat, characters, randomLevels(recordFormat, len(characters)))
+    with open(path, "ab") as file: file.write(bytes(recordFormat.recordSize // 2))
+    assert len(openRecords(path)) == len(characters)
+
+@pytest.mark.parametrize("name", FORMATS)
+def test_indexRecords(tmp_path, name):
+
+    recordFormat = FORMATS[name]
+    first, second = formatCharacters(recordFormat)[:2]
+    characters = [second, "", first, second]
+    path = writeRecords(tmp_path, name, recordFormat, characters, randomLevels(recordFormat, len(characters)))
+
+    # Blank labels are left out
+    sources, files = indexRecords(tmp_path)
+    assert sorted(sources) == sorted([first, second])
+    assert [source.path for source in sources[second]] == [path]
+    assert sources[second][0].records.tolist() == [0, 3]
+    assert sources[first][0].records.tolist() == [2]
+    assert files[os.path.basename(path)]["labels"] == characters
+
+def test_indexRecordsMissingDirectory(tmp_path):
+    assert indexRecords(tmp_path / "records") == ({}, {})
+
+def test_indexRecordsReusesCache(tmp_path, monkeypatch):
+
+    recordFormat = FORMATS["ETL8G"]
+    characters = CHARACTERS["JIS X 0208"]
+    path = writeRecords(tmp_path, "ETL8G", recordFormat, characters, randomLevels(recordFormat, len(characters)))
+    sources, files = indexRecords(tmp_path)
+
+    # Unchanged files are not read again
+    monkeypatch.setattr("etlReader.decodeLabels", lambda records, recordFormat: pytest.fail("labels were read again"))
+    cachedSources, cachedFiles = indexRecords(tmp_path, files)
+    assert cachedFiles == files
+    assert {character: [source.records.tolist() for source in entries] for character, entries in cachedSources.items()} \
+    == {character: [source.records.tolist() for source in entries] for character, entries in sources.items()}
+    monkeypatch.undo()
+
+    # Files that grew are
+    with open(path, "ab") as file: file.write(encodeRecords(recordFormat, ["日"], randomLevels(recordFormat, 1, 1)))
+    sources, files = indexRecords(tmp_path, files)
+    assert sources["日"][0].records.tolist() == [2, 5]
+    assert files[os.path.basename(path)]["labels"] == characters + ["日"]
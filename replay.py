@@ -0,0 +1,100 @@
+# Imports
+import argparse
+import random
+import tempfile
+import numpy as np
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+from src.modules import bootTrainer, bootDashboard
+from src.classes.ReviewScheduler import ReviewScheduler
+from src.classes.AttemptHistory import AttemptHistory
+from src.classes.SceneManager import SceneManager
+from src.classes.SampleStore import SampleStore
+from src.classes.InputPlayer import InputPlayer
+from src.classes.DataFile import DataFile
+from src.classes.Window import Window
+from src.modules.dictionary import STUDY_ITEMS
+
+# Replays a recorded session headlessly and reports its performance
+def main():
+
+    parser = argparse.ArgumentParser(description="Replays an input recording made with recordInput.")
+    parser.add_argument("recording", nargs="?", default="data/recording.jpir")
+    parser.add_argument("--seed", type=int, default=None, help="overrides the recorded shuffle seed")
+    parser.add_argument("--csv", default=None, help="writes per-frame stage timings to this path")
+    arguments = parser.parse_args()
+
+    # Headless drivers have no system cursors
+    if os.environ["SDL_VIDEODRIVER"] == "dummy": pg.mouse.set_system_cursor = lambda cursor: None
+
+    # Session starts from its recorded settings, kept away from the user's own
+    player = InputPlayer(arguments.recording)
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "settings.datcs")
+    player.writeSettings(path)
+    settings = DataFile(path, "data/annotatedSettings.datcs")
+    random.seed(player.seed if arguments.seed is None else arguments.seed)
+
+    window = Window(settings, "Replay")
+    window.scheduler = player
+    stores = {
+        "history": AttemptHistory(os.path.join(directory.name, "history.db")),
+        "samples": SampleStore(os.path.join(directory.name, "samples")),
+        "reviews": ReviewScheduler(os.path.join(directory.name, "reviews.bin"), len(STUDY_ITEMS), player.now),
+    }
+    stores["reviews"].restore(player.reviews)
+    window.profiler.logging = True
+    window.assets.preload(bootTrainer.ASSETS + bootDashboard.ASSETS)
+
+    # Dashboard is built up front so its predictions can be sampled every frame
+    scenes = SceneManager(window, settings, stores,
+    {"trainer": bootTrainer, "dashboard": bootDashboard},
+    {"trainer": "dashboard", "dashboard": "trainer"})
+    scenes.build("dashboard")
+    window.profiler.gauge("prediction", lambda: settledPrediction(player, scenes.states["dashboard"]["canvas"]))
+    scenes.run("trainer")
+
+    print(report(window.profiler, player))
+    if arguments.csv is not None: window.profiler.dump(arguments.csv)
+    window.quit()
+    settings.flush()
+    stores["history"].close()
+    stores["samples"].close()
+    directory.cleanup()
+
+# Reads the prediction once this frame's inference has finished
+def settledPrediction(player, canvas):
+    player.settle()
+    return canvas.prediction
+
+# Formats frame time distribution and prediction outputs
+def report(profiler, player):
+
+    # Work excludes time spent waiting on the recording
+    work = np.array([sum(sample["stages"].values()) for sample in profiler.samples])
+    lines = [f"{len(player.batches)} input batches, {len(profiler.samples)} frames"]
+    if len(work):
+        lines.append("frame work: " + ", ".join(f"p{percentile} {np.percentile(work, percentile):.2f} ms"
+        for percentile in (50, 90, 99)) + f", max {work.max():.2f} ms")
+
+    for stage in profiler.stages:
+        times = np.array([sample["stages"].get(stage, 0) for sample in profiler.samples])
+        lines.append(f"{stage:>10}: mean {times.mean():.3f} ms, p99 {np.percentile(times, 99):.3f} ms")
+
+    # Predictions are listed whenever they change
+    lines.append("predictions:")
+    previous = ""
+    for frame, sample in enumerate(profiler.samples):
+        prediction = sample["gauges"].get("prediction", "")
+        if prediction != previous: lines.append(f"  frame {frame}: {prediction}")
+        previous = prediction
+
+    return "\n".join(lines)
+
+# Main function call
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Imports
+import io
+import threading
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Asset manager class (Loads fonts, images and icons once per process)
+class AssetManager:
+
+    # Constructor
+    def __init__(self, window):
+
+        # Passed arguments
+        self.window = window
+
+        # Caches (Raw data is shared between every size of the same file)
+        self.files = {}
+        self.decoded = {}
+        self.fonts = {}
+        self.images = {}
+        self.models = {}
+
+        self.lock = threading.Lock()
+        self.modelLock = threading.Lock()
+        self.preloadThread = None
+
+    # Target resolution used in cache keys
+    def resolution(self): return (self.window.displayX, self.window.displayY)
+
+    # Loads assets from disk in the background
+    def preload(self, assets):
+        self.preloadThread = threading.Thread(target=self.loadAll, args=(list(assets), ), daemon=True)
+        self.preloadThread.start()
+
+    # Reads every listed asset (Runs off the render thread)
+    def loadAll(self, assets):
+        for kind, path, size in assets:
+            if kind == "font": self.readFile(path)
+            elif kind == "image": self.decodeImage(path)
+            elif kind == "model": self.model(path)
+
+    # Waits for preloading to finish
+    def wait(self):
+        if self.preloadThread is not None: self.preloadThread.join()
+
+    # Reads a file's bytes once
+    def readFile(self, path):
+
+        with self.lock:
+            if path in self.files: return self.files[path]
+
+        with open(path, "rb") as file:
+            data = file.read()
+
+        with self.lock: return self.files.setdefault(path, data)
+
+    # Decodes an image once, without display conversion
+    def decodeImage(self, path):
+
+        with self.lock:
+            if path in self.decoded: return self.decoded[path]
+
+        image = pg.image.load(io.BytesIO(self.readFile(path)), path)
+        with self.lock: return self.decoded.setdefault(path, image)
+
+    # Returns a shared model, loading it once (Callers wait for a load in progress instead of starting another)
+    def model(self, path):
+
+        with self.modelLock:
+            if path not in self.models:
+                from tensorflow import keras
+                self.models[path] = keras.models.load_model(path)
+            return self.models[path]
+
+    # Returns a shared font (Main thread only, SDL_ttf is not thread-safe)
+    def font(self, path, size):
+
+        key = (path, size, self.resolution())
+        if key not in self.fonts:
+
+            # Every font object reads from its own stream
+            self.fonts[key] = pg.font.Font(io.BytesIO(self.readFile(path)), size)
+
+        return self.fonts[key]
+
+    # Returns a converted and optionally scaled image (Main thread only)
+    def image(self, path, size=None, alpha=True):
+
+        key = (path, tuple(size) if size is not None else None, alpha, self.resolution())
+        if key not in self.images:
+
+            image = self.decodeImage(path)
+            image = image.convert_alpha() if alpha else image.convert()
+            if size is not None: image = pg.transform.smoothscale(image, size)
+            self.images[key] = image
+
+        return self.images[key]
+
+    # Reports cache sizes in bytes
+    def report(self):
+
+        with self.lock:
+            files = sum(len(data) for data in self.files.values())
+            decoded = sum(image.get_bytesize() * image.get_width() * image.get_height()
+            for image in self.decoded.values())
+
+        images = sum(image.get_bytesize() * image.get_width() * image.get_height() for image in self.images.values())
+        return {
+            "files": files,
+            "decoded": decoded,
+            "images": images,
+            "fonts": len(self.fonts),
+            "total": files + decoded + images,
+        }
+
+    # Formats memory report for logging
+    def summary(self):
+        report = self.report()
+        return (f" assets: {report['total'] / 1024 / 1024:.2f} MB ({report['files'] / 1024:.0f} KB files, "
+        f"{report['decoded'] / 1024:.0f} KB decoded, {report['images'] / 1024:.0f} KB converted, {report['fonts']} fonts)")
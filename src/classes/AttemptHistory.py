@@ -0,0 +1,120 @@
+# Imports
+import threading
+import sqlite3
+import queue
+import json
+import time
+
+# Attempt history class (Stores submitted attempts in SQLite from a background thread)
+class AttemptHistory:
+
+    # Marks the end of the queue
+    CLOSE = None
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS attempts (
+            id INTEGER PRIMARY KEY,
+            time REAL NOT NULL,
+            suite TEXT NOT NULL,
+            target TEXT NOT NULL,
+            predicted TEXT NOT NULL,
+            correct INTEGER NOT NULL,
+            topk TEXT NOT NULL,
+            boost REAL NOT NULL,
+            duration REAL NOT NULL,
+            strokes INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS attemptsByTarget ON attempts (target, time);
+        CREATE INDEX IF NOT EXISTS attemptsBySuite ON attempts (suite, target);
+    """
+
+    # Constructor
+    def __init__(self, path, capacity=1024, batchSize=64, flushInterval=2):
+
+        # Passed arguments
+        self.path = path
+        self.batchSize = batchSize
+        self.flushInterval = flushInterval
+
+        # Implied arguments
+        self.queue = queue.Queue(capacity)
+        self.writer = None
+        self.dropped = 0
+        self.written = 0
+
+    # Queues an attempt without touching the disk (Drops it if the writer is far behind)
+    def record(self, suite, target, predicted, topk, boost, duration, strokes):
+
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.writeLoop, daemon=True)
+            self.writer.start()
+
+        row = (time.time(), suite, target, predicted, int(predicted == target),
+        json.dumps(topk, ensure_ascii=False), boost, duration, strokes)
+        try: self.queue.put_nowait(row)
+        except queue.Full: self.dropped += 1
+
+    # Opens a connection in write-ahead log mode, creating tables if needed
+    def connect(self):
+
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(AttemptHistory.SCHEMA)
+        return connection
+
+    # Writes queued attempts in batched transactions
+    def writeLoop(self):
+
+        connection = self.connect()
+        closing = False
+        while not closing:
+
+            # Waits for a first row, then takes whatever else is queued
+            try: rows = [self.queue.get(timeout=self.flushInterval)]
+            except queue.Empty: continue
+            while len(rows) < self.batchSize:
+                try: rows.append(self.queue.get_nowait())
+                except queue.Empty: break
+
+            if AttemptHistory.CLOSE in rows:
+                closing = True
+                rows = [row for row in rows if row is not AttemptHistory.CLOSE]
+
+            if rows:
+                with connection:
+                    connection.executemany("INSERT INTO attempts (time, suite, target, predicted, correct, topk, "
+                    "boost, duration, strokes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self.written += len(rows)
+
+        connection.close()
+
+    # Writes remaining attempts and stops writer
+    def close(self):
+
+        if self.writer is None: return
+        self.queue.put(AttemptHistory.CLOSE)
+        self.writer.join()
+        self.writer = None
+
+    # Runs a read-only query on its own connection (Readers never block the writer)
+    def query(self, sql, parameters=()):
+
+        connection = self.connect()
+        try: return connection.execute(sql, parameters).fetchall()
+        finally: connection.close()
+
+    # Attempts, correct answers and mean time to submit for a character
+    def characterStats(self, character):
+        return self.query("SELECT COUNT(*), COALESCE(SUM(correct), 0), AVG(duration) FROM attempts "
+        "WHERE target = ?", (character, ))[0]
+
+    # Per-character attempts and accuracy for a suite, weakest first
+    def suiteStats(self, suite):
+        return self.query("SELECT target, COUNT(*), AVG(correct), AVG(duration) FROM attempts "
+        "WHERE suite = ? GROUP BY target ORDER BY AVG(correct), COUNT(*) DESC", (suite, ))
+
+    # Most recent attempts, newest first
+    def recent(self, limit=20):
+        return self.query("SELECT time, suite, target, predicted, correct, topk FROM attempts "
+        "ORDER BY id DESC LIMIT ?", (limit, ))
@@ -1,24 +1,26 @@
 # Imports
+from src.classes.Widget import Widget
+
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame as pg
 
 # Button class
-class Button:
+class Button(Widget):
 
     # Constructor
-    def __init__(self, window, position, size, lock="NA", **kwargs):
+    def __init__(self, window, position, size, lock="NA", action=None, **kwargs):
 
         # Passed arguments
-        self.window = window
-        self.position = position
-        self.size = size
+        super().__init__(window, position, size)
         self.lock = lock
+        self.action = action
 
         # Implied arguments
-        self.status = "base"
-        self.send = False
+        self.status = "highlight" if lock == "active" else "base"
         self.hovering = False
+        self.interactive = True
+        self.cursor = pg.SYSTEM_CURSOR_HAND
 
         # Default visual arguments
         self.visuals = {
@@ -50,94 +52,87 @@ class Button:
 
         # Icon preparation (Extract if dynamic buttons needed)
         if self.visuals["drawIcon"]:
-            self.iconBase = pg.image.load(self.visuals["iconBase"]).convert_alpha()
-            self.iconBase = pg.transform.smoothscale(self.iconBase, self.visuals["iconSize"])
-            self.iconHighlight = pg.image.load(self.visuals["iconHighlight"]).convert_alpha()
-            self.iconHighlight = pg.transform.smoothscale(self.iconHighlight, self.visuals["iconSize"])
-            self.iconClick = pg.image.load(self.visuals["iconClick"]).convert_alpha()
-            self.iconClick = pg.transform.smoothscale(self.iconClick, self.visuals["iconSize"])
+            self.iconBase = window.assets.image(self.visuals["iconBase"], self.visuals["iconSize"])
+            self.iconHighlight = window.assets.image(self.visuals["iconHighlight"], self.visuals["iconSize"])
+            self.iconClick = window.assets.image(self.visuals["iconClick"], self.visuals["iconSize"])
+            self.icons = {"base": self.iconBase, "highlight": self.iconHighlight, "click": self.iconClick}
+
+        # Visual keys used by each status
+        self.colors = {"base": "colorBase", "highlight": "colorHighlight", "click": "colorClick"}
 
         # Text preparation (Extract if dynamic buttons needed)
-        self.font = pg.font.Font("data/latoBlack.ttf", self.visuals["textSize"])
+        self.font = window.assets.font("data/latoBlack.ttf", self.visuals["textSize"])
         self.text = self.font.render(self.visuals["text"], True, self.visuals["textColor"])
         self.textSize = self.font.size(self.visuals["text"])
     
-    # Updates button's status
-    def update(self, position, pressed, released, blocked=False):
+    # Button is being hovered
+    def onEnter(self):
+        self.hovering = True
+        if self.lock == "NA": self.setStatus("highlight")
 
-        if not blocked:
-
-            # Button is being hovered
-            if self.position[0] < position[0] < self.position[0] + self.size[0] and \
-            self.position[1] < position[1] < self.position[1] + self.size[1]:
+    # Button stopped being hovered
+    def onLeave(self):
+        self.hovering = False
+        if self.lock == "NA": self.setStatus("base")
 
-                pg.mouse.set_system_cursor(pg.SYSTEM_CURSOR_HAND)
-                self.hovering = True
-                self.status = "click" if pressed[0] else "highlight"
-                self.send = released == 1
+    # Button is being clicked
+    def onPress(self, position):
+        if self.lock == "NA": self.setStatus("click")
 
-            # Button stopped being hovered
-            elif self.hovering:
+    # Button was released, sending its action if still hovered
+    def onRelease(self, position, inside):
 
-                pg.mouse.set_system_cursor(pg.SYSTEM_CURSOR_ARROW)
-                self.hovering = False
-                self.status = "base"
+        # Locked buttons never send
+        if self.lock != "NA": return
+        self.setStatus("highlight" if inside else "base")
+        if inside and self.action is not None: self.action()
 
-            # Button is in permanent active state
-            if self.lock == "active":
-                self.status = "highlight"
-                self.send = False
+    # Changes button's status, redrawing only on change
+    def setStatus(self, status):
+        if status == self.status: return
+        self.status = status
+        self.invalidate()
 
-            # Button is in permanent inactive state
-            elif self.lock == "inactive":
-                self.status = "base"
-                self.send = False
+    # Locks button in a permanent active or inactive state
+    def setLock(self, lock):
+        self.lock = lock
+        if lock == "active": self.setStatus("highlight")
+        elif lock == "inactive": self.setStatus("base")
 
-        self.draw()
-    
     # Unlocks button
     def unlock(self):
         self.lock = "NA"
-        self.status = "base"
+        self.setStatus("highlight" if self.hovering else "base")
+
+    # Renders button's status into its cached surface
+    def render(self):
+
+        # Nothing to draw for invisible hitboxes
+        if not (self.visuals["drawBackground"] or self.visuals["drawIcon"] or self.visuals["drawText"]):
+            self.surface = None
+            return
 
-    # Draws button's status
-    def draw(self):
+        if self.surface is None: self.surface = pg.Surface(self.size, pg.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        body = pg.Rect(0, 0, *self.size)
 
         if self.visuals["drawBackground"]:
 
             # Draws body of button
-            if self.status == "base":
-                pg.draw.rect(self.window.display, self.visuals["colorBase"],
-                pg.Rect(*self.position, *self.size), border_radius=self.visuals["borderRadius"])
-            elif self.status == "highlight":
-                pg.draw.rect(self.window.display, self.visuals["colorHighlight"],
-                pg.Rect(*self.position, *self.size), border_radius=self.visuals["borderRadius"])
-            elif self.status == "click":
-                pg.draw.rect(self.window.display, self.visuals["colorClick"],
-                pg.Rect(*self.position, *self.size), border_radius=self.visuals["borderRadius"])
+            pg.draw.rect(self.surface, self.visuals[self.colors[self.status]], body,
+            border_radius=self.visuals["borderRadius"])
 
             # Draws border
             if self.visuals["drawBorder"]:
-                pg.draw.rect(self.window.display, self.visuals["borderColor"], pg.Rect(
-                *self.position, *self.size), border_radius=self.visuals["borderRadius"],
-                width=self.visuals["borderWidth"])
+                pg.draw.rect(self.surface, self.visuals["borderColor"], body,
+                border_radius=self.visuals["borderRadius"], width=self.visuals["borderWidth"])
 
         # Draws icon
         if self.visuals["drawIcon"]:
-            if self.status == "base":
-                self.window.blit(self.iconBase, (self.position[0] + self.size[0] / 2 -
-                self.visuals["iconSize"][0] / 2, self.position[1] + self.size[1] / 2 -
-                self.visuals["iconSize"][1] / 2))
-            elif self.status == "highlight":
-                self.window.blit(self.iconHighlight, (self.position[0] + self.size[0] / 2 -
-                self.visuals["iconSize"][0] / 2, self.position[1] + self.size[1] / 2 -
-                self.visuals["iconSize"][1] / 2))
-            elif self.status == "click":
-                self.window.blit(self.iconClick, (self.position[0] + self.size[0] / 2 -
-                self.visuals["iconSize"][0] / 2, self.position[1] + self.size[1] / 2 -
-                self.visuals["iconSize"][1] / 2))
+            self.surface.blit(self.icons[self.status], (self.size[0] / 2 - self.visuals["iconSize"][0] / 2,
+            self.size[1] / 2 - self.visuals["iconSize"][1] / 2))
 
         # Draws text
         if self.visuals["drawText"]:
-            self.window.blit(self.text, (self.position[0] + self.size[0] / 2 - self.textSize[0] / 2,
-            self.position[1] + self.size[1] / 2 - self.textSize[1] / 2))
+            self.surface.blit(self.text, (self.size[0] / 2 - self.textSize[0] / 2,
+            self.size[1] / 2 - self.textSize[1] / 2))
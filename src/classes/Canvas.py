@@ -2,24 +2,26 @@
 import time
 import threading
 from tensorflow import keras
+import tensorflow as tf
 import matplotlib.pyplot as plt
 import numpy as np
 from src.modules.dictionary import *
+from src.classes.FrameScheduler import FrameScheduler
+from src.classes.StrokeLog import StrokeLog
+from src.classes.Widget import Widget
 
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame as pg
 
-# Button class
-class Canvas:
+# Canvas class
+class Canvas(Widget):
 
     # Constructor
     def __init__(self, window, position, size):
 
         # Passed arguments
-        self.window = window
-        self.position = position
-        self.size = size
+        super().__init__(window, position, size)
         self.backgroundColor = (255, 255, 255)
         self.guideColor = (255, 0, 0)
 
@@ -31,147 +33,313 @@ class Canvas:
 
         # Drawing variables
         self.held = False
-        self.previous = (-1, -1)
-        self.timer = None
-        self.refreshRate = 0.01
+        self.stroke = []
+        self.drawn = 0
+        self.history = StrokeLog()
+        self.brushOffsets = None
+        self.pendingPrediction = False
+        self.interactive = True
 
         self.preview = pg.Surface((200, 200)).convert()
         self.preview.fill(self.backgroundColor)
+        self.previewRect = pg.Rect(self.position[0] + self.size[0] + 50, self.position[1], 200, 200)
+        self.predictionRect = pg.Rect(self.position[0] + self.size[0] + 50, self.position[1] + 700, 200, 200)
+
+        # Guides are rendered once and layered over the drawing
+        self.guides = pg.Surface(self.size, pg.SRCALPHA)
+        for guide in range(2):
+            pg.draw.line(self.guides, self.guideColor, (self.size[0] / 3 * (guide + 1), 0),
+            (self.size[0] / 3 * (guide + 1), self.size[1]), 2)
+            pg.draw.line(self.guides, self.guideColor, (0, self.size[1] / 3 * (guide + 1)),
+            (self.size[0], self.size[1] / 3 * (guide + 1)), 2)
 
         self.kanaModel = None
         self.n5Model = None
+        self.calls = {}
         self.predictions = []
         self.predictionThread = threading.Thread(target=self.loadModels)
         self.predictionThread.start()
+        self.inferenceTime = 0
         self.prediction = ""
+        self.topPredictions = []
+        self.pixels = None
 
         self.boostIndex = None
         self.boostSuite = ""
         self.boostMagnitude = 0.2
 
-        self.predictionFont = pg.font.Font("data/tsunagiGothic.ttf", 130)
+        self.predictionFont = window.assets.font("data/tsunagiGothic.ttf", 130)
         self.predictionRender = None
+        self.predictionChanged = False
     
     # Loads used models
     def loadModels(self):
-        self.kanaModel = keras.models.load_model("model/hkModel")
-        self.n5Model = keras.models.load_model("model/n5Model")
-
-    # Updates button's status
-    def update(self, position, pressed):
-
-        drawing = False
-
-        # User is drawing in canvas
-        if self.position[0] <= position[0] <= self.position[0] + self.size[0] and \
-        self.position[1] <= position[1] <= self.position[1] + self.size[1] and pressed[0]:
-
-            if self.held == False:
-                drawing = True
-
-                # Starts canvas status
-                self.held = True
-                self.previous = position
-                self.timer = time.time()
-
-        # Stopped holding
-        elif self.held:
-
-            # Draws end of line
-            drawing = True
-
-            # Resets canvas status
-            self.held = False
-            self.previous = (-1, -1)
-            self.timer = None
-
-        # Drawing link
-        if self.held and time.time() - self.timer >= self.refreshRate:
-
-            # Draws body of line
-            start = (self.previous[0] - self.position[0], self.previous[1] - self.position[1])
-            end = (position[0] - self.position[0], position[1] - self.position[1])
-            self.connect(start, end)
-            
-            # Updates canvas status
-            self.held = True
-            self.previous = position
-            self.timer = time.time()
-            drawing = True
-        
-        if drawing: self.handlePrediction()
-        self.draw(position)
-    
-    # Draws a smooth line composed of circles
-    def connect(self, start, end):
 
-        # Draws endpoints 
-        pg.draw.circle(self.canvas, self.brushColor, start, int(self.brushSize / 2.2))
-        pg.draw.circle(self.canvas, self.brushColor, end, int(self.brushSize / 2.2))
-        pg.draw.line(self.canvas, self.brushColor, start, end, self.brushSize)
+        kanaModel = self.window.assets.model("model/hkModel")
+        n5Model = self.window.assets.model("model/n5Model")
+
+        # Applies weights fine-tuned on the user's drawings
+        if os.path.exists("data/finetune/hkModel.h5"): kanaModel.load_weights("data/finetune/hkModel.h5")
+        if os.path.exists("data/finetune/n5Model.h5"): n5Model.load_weights("data/finetune/n5Model.h5")
+        self.setModel("kanaModel", kanaModel)
+        self.setModel("n5Model", n5Model)
+
+    # Sets a model and the compiled call predictions go through (predict repeats its setup for every drawing)
+    def setModel(self, attribute, model):
+        self.calls[attribute] = tf.function(lambda inputs: model(inputs, training=False))
+        setattr(self, attribute, model)
+
+    # Loads new weights into a copy of a model, then swaps it in (Predictions keep using the old one meanwhile)
+    def swapWeights(self, attribute, path):
+
+        def swap():
+            model = keras.models.clone_model(getattr(self, attribute))
+            model.load_weights(path)
+            self.setModel(attribute, model)
+
+        threading.Thread(target=swap, daemon=True).start()
+
+    # Starts a stroke
+    def onPress(self, position):
+        self.held = True
+        self.stroke = [self.toCanvas(position)]
+        self.drawn = 0
+
+    # Buffers every motion sample of the current stroke
+    def onMotion(self, position, held):
+
+        # Stopped holding or left canvas
+        inside = self.rect().collidepoint(position)
+        if self.held and (not held or not inside): self.endStroke()
+        elif self.held: self.stroke.append(self.toCanvas(position))
+
+        # Came back in, or a drag from outside entered, with the button still held (Captured so its release ends it)
+        elif held and inside:
+            self.onPress(position)
+            return True
+
+    # Ends the current stroke
+    def onRelease(self, position, inside):
+        if self.held: self.endStroke()
+
+    # Finishes the stroke, records it and resets canvas status
+    def endStroke(self):
+        self.flushStroke(final=True)
+        self.held = False
+        self.record(self.stroke, self.brushSize, self.tool())
+        self.stroke = []
+
+    # Converts a display position into whole canvas coordinates
+    def toCanvas(self, position):
+        return (int(round(position[0] - self.position[0])), int(round(position[1] - self.position[1])))
+
+    # Updates canvas's status once per frame
+    def update(self):
+
+        # Rasterizes this frame's samples at once
+        if self.held: self.flushStroke()
+
+        # Preprocessing runs at most once per frame
+        if self.pendingPrediction:
+            self.pendingPrediction = False
+            self.handlePrediction()
+
+        # Predictions arrive from a worker thread and are redrawn here
+        if self.predictionChanged:
+            self.predictionChanged = False
+            self.invalidate(self.predictionRect)
+
+    # Number of predictions waiting or running
+    def queueDepth(self): return int(self.pendingPrediction) + int(self.predictionThread.is_alive())
 
-    # Draws canvas status
-    def draw(self, position):
+    # Rasterizes every stroke segment whose spline is fully known
+    def flushStroke(self, final=False):
 
-        # Draws canvas
-        self.window.blit(self.canvas, self.position)
+        # A segment's tangent needs the point after it, unless the stroke ended
+        last = len(self.stroke) - (1 if final else 2)
+        if last <= self.drawn and not (final and len(self.stroke) == 1): return
 
-        # Draws vertical guides
-        for vGuide in range(2):
-            pg.draw.line(self.window.display, self.guideColor, (self.position[0] + self.size[0] / 3 * (vGuide + 1),
-            self.position[1]), (self.position[0] + self.size[0] / 3 * (vGuide + 1), self.position[1] + self.size[1]), 2)
+        self.rasterize(self.canvas, self.stroke, self.drawn, last, final, self.brushColor, self.brushSize)
+        self.drawn = last
+        self.pendingPrediction = True
 
-        # Draws horizontal guides
-        for hGuide in range(2):
-            pg.draw.line(self.window.display, self.guideColor, (self.position[0],
-            self.position[1] + self.size[1] / 3 * (hGuide + 1)), (self.position[0] + \
-                self.size[0], self.position[1] + self.size[1] / 3 * (hGuide + 1)), 2)
+    # Draws stroke segments first to last onto a surface
+    def rasterize(self, surface, points, first, last, final, color, size):
+
+        samples = self.smoothStroke(np.array(points, dtype=float), first, last, final, max(size / 4, 1))
+        self.stamp(surface, samples, color, size / 2)
+
+    # Samples a Catmull-Rom spline through points for segments first to last
+    def smoothStroke(self, points, first, last, final, spacing):
+
+        if len(points) == 1: return points
+
+        # Endpoints are repeated so every segment has four control points
+        padded = np.vstack([points[:1], points, points[-1:]])
+        segments = np.arange(first, last)
+        p0, p1, p2, p3 = padded[segments], padded[segments + 1], padded[segments + 2], padded[segments + 3]
+
+        # Samples each segment densely enough for the brush to overlap
+        counts = np.maximum(np.ceil(np.hypot(*(p2 - p1).T) / spacing).astype(int), 1)
+        segment = np.repeat(np.arange(len(counts)), counts)
+        t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts, counts)
+        t = t[:, None]
+
+        a, b, c, d = p0[segment], p1[segment], p2[segment], p3[segment]
+        samples = 0.5 * (2 * b + (c - a) * t + (2 * a - 5 * b + 4 * c - d) * t ** 2 + (3 * b - a - 3 * c + d) * t ** 3)
+
+        # The final point closes the stroke
+        if final: samples = np.vstack([samples, points[-1:]])
+        return samples
+
+    # Stamps a round brush at every sample in a single array write
+    def stamp(self, surface, samples, color, radius):
+
+        # Disk offsets are cached per brush radius
+        if self.brushOffsets is None or self.brushOffsets[0] != radius:
+            extent = int(np.ceil(radius))
+            ys, xs = np.mgrid[-extent:extent + 1, -extent:extent + 1]
+            disk = xs ** 2 + ys ** 2 <= radius ** 2
+            self.brushOffsets = (radius, np.stack([xs[disk], ys[disk]], axis=1))
+
+        # Covered pixels are marked in a mask over the stroke's bounding box
+        centers = np.unique(np.rint(samples).astype(np.int32), axis=0)
+        extent = int(np.ceil(radius))
+        low = np.maximum(centers.min(axis=0) - extent, 0)
+        high = np.minimum(centers.max(axis=0) + extent + 1, surface.get_size())
+        if (high <= low).any(): return
+
+        pixels = (centers[:, None, :] + self.brushOffsets[1][None]).reshape(-1, 2) - low
+        keep = (pixels >= 0).all(axis=1) & (pixels < high - low).all(axis=1)
+        mask = np.zeros(high - low, dtype=bool)
+        mask[pixels[keep, 0], pixels[keep, 1]] = True
+
+        # Writes the whole stroke at once
+        view = pg.surfarray.pixels3d(surface)
+        view[low[0]:high[0], low[1]:high[1]][mask] = color[:3]
+        del view
+
+        # Damages only the stroked area
+        if surface is self.canvas: self.invalidate(pg.Rect(*(low + self.position), *(high - low)))
+
+    # Area affected by the canvas, preview and prediction boxes
+    def bounds(self): return self.rect().unionall([self.previewRect, self.predictionRect])
+
+    # Composites canvas status
+    def draw(self, target):
+
+        # Draws canvas and guides
+        target.blit(self.canvas, self.position)
+        target.blit(self.guides, self.position)
 
         # Draws preview
-        self.window.blit(self.preview, (self.position[0] + self.size[0] + 50, self.position[1]))
+        target.blit(self.preview, self.previewRect)
 
         # Draws predictions
-        pg.draw.rect(self.window.display, self.backgroundColor,
-        (self.position[0] + self.size[0] + 50, self.position[1] + 700, 200, 200))
+        pg.draw.rect(target, self.backgroundColor, self.predictionRect)
 
         if self.prediction != "":
-            self.window.blit(self.predictionRender,
-            (self.position[0] + self.size[0] + 85, self.position[1] + 735))
-        
-        # Draws brush size guide
-        pg.draw.circle(self.window.display, (255, 0, 0), position, self.brushSize / 2, 4)
+            target.blit(self.predictionRender, (self.predictionRect[0] + 35, self.predictionRect[1] + 35))
 
-    # Resets canvas
+    # Resets canvas, keeping the wipe in history
     def wipeCanvas(self):
+        self.clear()
+        self.record([], 0, StrokeLog.WIPE)
+
+    # Resets canvas and forgets its history
+    def resetCanvas(self):
+        self.clear()
+        self.history.clear()
+
+    # Blanks canvas, preview and prediction
+    def clear(self):
         self.canvas.fill(self.backgroundColor)
         self.preview.fill(self.backgroundColor)
         self.prediction = ""
+        self.topPredictions = []
+        self.pixels = None
+        self.invalidate()
+
+    # Tool currently selected
+    def tool(self): return StrokeLog.ERASER if self.brushColor == self.backgroundColor else StrokeLog.BRUSH
+
+    # Appends an entry to history, snapshotting periodically
+    def record(self, points, size, tool):
+        self.history.append(points, size, tool)
+        if self.history.wantsKeyframe():
+            self.history.addKeyframe(self.history.length, pg.image.tostring(self.canvas, "RGB"))
+
+    # Undoes last entry by replaying history
+    def undo(self):
+        if self.held or not self.history.undo(): return
+        self.replay(self.history.length, self.canvas)
+        self.refresh()
+
+    # Redoes next entry on top of the current canvas
+    def redo(self):
+        if self.held or not self.history.redo(): return
+        self.replayEntry(self.history.length - 1, self.canvas)
+        self.refresh()
+
+    # Redraws and re-predicts after history changes
+    def refresh(self):
+        self.invalidate()
+        self.handlePrediction()
+
+    # Rebuilds the state after count entries onto a surface
+    def replay(self, count, surface):
+
+        # Starts from the closest keyframe or wipe
+        start, pixels = self.history.base(count)
+        if pixels is None: surface.fill(self.backgroundColor)
+        else: surface.blit(pg.image.fromstring(pixels, self.size, "RGB"), (0, 0))
+
+        for index in range(start, count): self.replayEntry(index, surface)
+        return surface
+
+    # Draws a single history entry onto a surface
+    def replayEntry(self, index, surface):
+
+        points, size, tool = self.history.entry(index)
+        if tool == StrokeLog.WIPE: surface.fill(self.backgroundColor)
+        else:
+            color = self.backgroundColor if tool == StrokeLog.ERASER else (0, 0, 0)
+            self.rasterize(surface, points, 0, len(points) - 1, True, color, size)
+
+    # Model input at any point in history
+    def sampleAt(self, count):
+        surface = pg.Surface(self.size).convert()
+        return self.preprocess(self.replay(count, surface))[0]
+
+    # Converts a surface into the model's 50x50 input and its grayscale pixels
+    def preprocess(self, surface):
+        target = pg.transform.smoothscale(surface, (50, 50))
+        pixels = np.min(pg.surfarray.array3d(target), axis=2).T
+        return (pixels / 255).reshape(1, 50, 50, 1), target, pixels
 
     # Handles predictions of canvas
     def handlePrediction(self):
 
         # Generates preview
-        sample = []
-        target = pg.transform.smoothscale(self.canvas, (50, 50))
-        for row in range(50):
-            for col in range(50):
-                sample.append(min(target.get_at((col, row))) / 255)
-        sample = np.array(sample)
+        sample, target, self.pixels = self.preprocess(self.canvas)
 
         # Makes predictions
         if self.kanaModel is not None and self.n5Model is not None:
-            if not self.predictionThread.isAlive():
+            if not self.predictionThread.is_alive():
                 self.predictionThread = threading.Thread(
-                target=self.makePredictions, args=(sample.reshape(1, 50, 50, 1), ))
+                target=self.makePredictions, args=(sample, ))
                 self.predictionThread.start()
 
         self.preview = pg.transform.scale(target, (200, 200))
+        self.invalidate(self.previewRect)
         
     # Makes predictions
     def makePredictions(self, data):
 
-        kanaPrediction = self.kanaModel.predict(data, verbose=0)
-        n5Prediction = self.n5Model.predict(data, verbose=0)
+        start = time.perf_counter()
+        data = data.astype(np.float32)
+        kanaPrediction = np.array(self.calls["kanaModel"](data))
+        n5Prediction = np.array(self.calls["n5Model"](data))
 
         if self.boostSuite == "kana":
             kanaPrediction[0][self.boostIndex] += self.boostMagnitude
@@ -190,7 +358,15 @@ class Canvas:
             self.prediction = kana[kanaPrediction.argmax()]
         else: self.prediction = N5KANJI[n5Prediction.argmax()]
 
+        # Keeps best guesses across both models for the attempt history
+        probabilities = np.concatenate((kanaPrediction[0], n5Prediction[0]))
+        best = np.argsort(probabilities)[::-1][:5]
+        self.topPredictions = [((kana + N5KANJI)[index], round(float(probabilities[index]), 4)) for index in best]
+
         self.predictionRender = self.predictionFont.render(self.prediction, True, (0, 0, 0))
+        self.inferenceTime = (time.perf_counter() - start) * 1000
+        self.predictionChanged = True
+        FrameScheduler.wake()
     
     # Boosts the confidence in correct value to give user benefit of the doubt
     def boostCharacter(self, character):
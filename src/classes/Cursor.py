@@ -0,0 +1,42 @@
+# Imports
+from src.classes.Widget import Widget
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Cursor class (Ring drawn around the pointer)
+class Cursor(Widget):
+
+    # Constructor
+    def __init__(self, window, radius, color=(255, 0, 0), width=4):
+
+        # Passed arguments
+        super().__init__(window, (-radius * 2, -radius * 2), (radius * 2, radius * 2))
+        self.radius = radius
+        self.color = color
+        self.width = width
+
+    # Area around the ring, centered on position
+    def bounds(self):
+        return pg.Rect(self.position[0] - self.radius - 1, self.position[1] - self.radius - 1,
+        self.radius * 2 + 2, self.radius * 2 + 2)
+
+    # Centers ring on pointer
+    def follow(self, position): self.move((int(position[0]), int(position[1])))
+
+    # Resizes ring
+    def setRadius(self, radius):
+        if radius == self.radius: return
+        self.damage.append(self.bounds())
+        self.radius = radius
+        self.size = (radius * 2, radius * 2)
+        self.invalidate()
+
+    # Renders ring into its cached surface
+    def render(self):
+        self.surface = pg.Surface((self.radius * 2 + 2, self.radius * 2 + 2), pg.SRCALPHA)
+        pg.draw.circle(self.surface, self.color, (self.radius + 1, self.radius + 1), self.radius, self.width)
+
+    # Composites ring centered on position
+    def draw(self, target): target.blit(self.getSurface(), self.bounds())
@@ -1,53 +1,242 @@
 # Imports
+import threading
+import warnings
+import marshal
+import time
+import re
 import os
 
 # Handles datcs format files
 class DataFile:
 
+    # Version of the binary sidecar cache layout
+    CACHE_VERSION = 2
+
+    # One line: optional key::value, where quoted strings may hold "#" and escaped quotes, then an optional comment
+    LINE = re.compile(r'\s*(?:(?P<key>[^\s:#"]+)\s*::\s*(?P<value>"(?:[^"\\]|\\.)*"|[^"#]*?))?\s*(?:#.*)?')
+    ESCAPE = re.compile(r"\\(.)")
+
     # Constructor
-    def __init__(self, path):
+    def __init__(self, path, schema=None, debounce=0.5):
 
         self.data = {}
         self.path = path
+        self.cachePath = path + ".cache"
+
+        # Saves are coalesced and written by a background thread
+        self.debounce = debounce
+        self.dirty = set()
+        self.pending = False
+        self.saveAt = 0
+        self.writer = None
+        self.condition = threading.Condition()
+        self.writeLock = threading.Lock()
 
-        # Fetches existing file data
+        # Expected types and defaults come from an annotated copy of the file
+        self.defaults = DataFile(schema).data if schema is not None else {}
+
+        # Fetches existing file data, skipping the parser while the source is unchanged
         if os.path.exists(self.path):
-            with open(self.path, "r") as file:
-                for line in file:
-                    
-                    # Line is reading a string
-                    if "\"" in line:
-                        line = line.split("\"")
-                        self.data[line[0].strip().split("::")[0]] = f"{line[1]}"
-
-                    else:
-
-                        # Cleans up line of data
-                        line = "".join(line.split())
-                        line = line.split("#")[0]
-                        info = line.split("::")
-
-                        # If line is valid, add it to data
-                        if line != "" and len(info) == 2:
-                            self.data[info[0]] = eval(info[1])
-
-    # Saves current data
+            self.data = self.loadCache()
+            if self.data is None:
+                self.data = self.parse()
+                self.writeCache()
+        self.applySchema()
+
+    # Parses source file without evaluating it
+    def parse(self):
+
+        data = {}
+        with open(self.path, "r", encoding="utf-8") as file:
+            for number, line in enumerate(file, 1):
+
+                # Comments and blank lines have no key
+                match = DataFile.LINE.fullmatch(line.rstrip("\n"))
+                if match is None:
+                    warnings.warn(f"{self.path}:{number}: unreadable line {line.strip()!r}")
+                    continue
+                key, text = match["key"], match["value"]
+                if key is None: continue
+
+                # Strings are kept as written, anything else is a literal
+                if text.startswith("\""):
+                    data[key] = DataFile.ESCAPE.sub(r"\1", text[1:-1])
+                    continue
+                try: value = DataFile.parseValue("".join(text.split()))
+                except ValueError:
+                    if key not in self.defaults: raise ValueError(f"{self.path}:{number}: bad value {text!r}")
+                    value = self.defaults[key]
+                data[key] = value
+
+        # Values whose type does not match the schema fall back to defaults
+        for key, default in self.defaults.items():
+            if key in data and type(data[key]) != type(default): data[key] = default
+
+        return data
+
+    # Fills settings missing from the file with schema defaults and warns about unknown ones
+    def applySchema(self):
+
+        if not self.defaults: return
+        for key, default in self.defaults.items():
+            if key not in self.data:
+                self.data[key] = default
+                self.dirty.add(key)
+
+        unknown = [key for key in self.data if key not in self.defaults]
+        if unknown: warnings.warn(f"{self.path}: unknown settings {', '.join(unknown)}")
+
+    # Converts a literal into an int, float, bool or tuple of those
+    @staticmethod
+    def parseValue(text):
+
+        if text == "True": return True
+        if text == "False": return False
+
+        # Tuples such as RGB colors
+        if text.startswith("(") and text.endswith(")"):
+            parts = text[1:-1].split(",")
+            if parts[-1] == "": parts.pop()
+            return tuple(DataFile.parseValue(part) for part in parts)
+
+        try: return int(text)
+        except ValueError: pass
+        try: return float(text)
+        except ValueError: raise ValueError(f"Unsupported value {text!r}") from None
+
+    # Returns cached data if it was written for the current source file
+    def loadCache(self):
+
+        try:
+            with open(self.cachePath, "rb") as file: version, mtime, size, defaults, data = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError): return None
+
+        status = os.stat(self.path)
+        if version != DataFile.CACHE_VERSION or mtime != status.st_mtime_ns or size != status.st_size: return None
+        if defaults != self.defaults: return None
+        return data
+
+    # Stores parsed data next to its source
+    def writeCache(self, data=None):
+
+        status = os.stat(self.path)
+        cache = (DataFile.CACHE_VERSION, status.st_mtime_ns, status.st_size, self.defaults,
+        self.data if data is None else data)
+        try:
+            with open(self.cachePath, "wb") as file: file.write(marshal.dumps(cache))
+        except OSError: pass
+
+    # Schedules changed data to be written once saves stop arriving
     def save(self):
 
-        with open(self.path, "w") as file:
-            for key in self.data.keys():
+        with self.condition:
+            if not self.dirty: return
+            self.pending = True
+            self.saveAt = time.monotonic() + self.debounce
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.writeLoop, daemon=True)
+                self.writer.start()
+            self.condition.notify()
+
+    # Writes pending changes now (Called before exiting)
+    def flush(self):
+
+        # Snapshots are taken under the write lock so writes land in order
+        with self.writeLock:
+            with self.condition:
+                if not self.pending: return
+                self.pending = False
+                data = self.snapshot()
+            self.write(data)
+
+    # Background writer, waiting out the debounce before each write
+    def writeLoop(self):
+
+        while True:
+            with self.condition:
+                while not self.pending: self.condition.wait()
+                remaining = self.saveAt - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+            self.flush()
+
+    # Copies data and marks it clean (Called with condition held)
+    def snapshot(self):
+        self.dirty.clear()
+        return dict(self.data)
+
+    # Replaces file atomically so a crash never leaves it half written
+    def write(self, data):
+
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as file:
+            for key in data.keys():
 
                 # Saves formatted value
-                value = self.data[key]
+                value = data[key]
                 if type(value) == str:
-                    value = f"\"{value}\""
+                    value = "\"" + value.replace("\\", "\\\\").replace("\"", "\\\"") + "\""
                 file.write(f"{key}::{value}\n")
 
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary, self.path)
+        self.writeCache(data)
+
     # Deletes a given key value pair
-    def delete(self, key): del self.data[key]
+    def delete(self, key):
+        del self.data[key]
+        self.dirty.add(key)
 
     # Gets a data value
     def get(self, key): return self.data[key]
 
-    # Sets a data value
-    def set(self, key, value): self.data[key] = value
+    # Sets a data value, tracking keys that changed since the last write
+    def set(self, key, value):
+        if key in self.data and self.data[key] == value and type(self.data[key]) == type(value): return
+        self.data[key] = value
+        self.dirty.add(key)
+
+# Measures how long a large synthetic file takes to load through the parser and the cache
+def benchmark(lineCount=100000):
+
+    import tempfile
+    import ast
+    values = ["True", "12", "0.5", "(97, 167, 228)", "\"text # not a comment\""]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.datcs")
+        with open(path, "w", encoding="utf-8") as file:
+            for number in range(lineCount):
+                if number % 10 == 0: file.write(f"# Comment {number}\n")
+                file.write(f"key{number}::{values[number % len(values)]}\n")
+
+        # Literal evaluation of each value stands in for the old eval based loader
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if "::" in line: ast.literal_eval(line.split("::", 1)[1])
+        evaluated = time.perf_counter() - start
+
+        start = time.perf_counter()
+        DataFile(path)
+        parsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        DataFile(path)
+        cached = time.perf_counter() - start
+
+    print(f"{lineCount} lines: literal_eval {evaluated * 1000:.0f} ms, parser {parsed * 1000:.0f} ms, "
+    f"cache {cached * 1000:.0f} ms")
+
+# Runs benchmark from the command line (python -m src.classes.DataFile --benchmark)
+if __name__ == "__main__":
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Loads datcs files.")
+    parser.add_argument("--benchmark", action="store_true", help="measures parser and cache load times")
+    parser.add_argument("--lines", type=int, default=100000, help="lines in the benchmark file")
+    arguments = parser.parse_args()
+    if arguments.benchmark: benchmark(arguments.lines)
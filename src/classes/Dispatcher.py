@@ -0,0 +1,105 @@
+# Imports
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Dispatcher class (Routes mouse events to the widget under the pointer)
+class Dispatcher:
+
+    # Constructor
+    def __init__(self, window, scene, cellSize=100):
+
+        # Passed arguments
+        self.window = window
+        self.scene = scene
+        self.cellSize = cellSize
+
+        # Implied arguments
+        self.grid = {}
+        self.widgets = []
+        self.listeners = []
+        self.hovered = None
+        self.captured = None
+        self.position = (-1, -1)
+        self.rebuild()
+
+    # Indexes interactive widget rects into grid cells
+    def rebuild(self):
+
+        self.grid = {}
+        self.widgets = [widget for widget in self.scene.walk(hidden=True) if widget.interactive]
+
+        # Later widgets are drawn on top, so they are stored last
+        for widget in self.widgets:
+            for cell in self.cells(widget.rect()):
+                self.grid.setdefault(cell, []).append(widget)
+
+    # Grid cells covered by a rect
+    def cells(self, rect):
+        for col in range(rect.left // self.cellSize, (rect.right - 1) // self.cellSize + 1):
+            for row in range(rect.top // self.cellSize, (rect.bottom - 1) // self.cellSize + 1):
+                yield col, row
+
+    # Registers a callback receiving every pointer position
+    def listen(self, listener):
+        self.listeners.append(listener)
+        return self
+
+    # Finds top-most widget under a position
+    def widgetAt(self, position):
+
+        cell = (int(position[0] // self.cellSize), int(position[1] // self.cellSize))
+        for widget in reversed(self.grid.get(cell, [])):
+            if widget.visible and widget.rect().collidepoint(position):
+                return widget
+        return None
+
+    # Routes a batch of events
+    def dispatch(self, events):
+
+        for event in events:
+
+            if event.type not in (pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP): continue
+            position = (event.pos[0] * self.window.aspectX, event.pos[1] * self.window.aspectY)
+            self.position = position
+
+            # Pointer moved
+            if event.type == pg.MOUSEMOTION:
+                for listener in self.listeners: listener(position)
+                self.hover(self.widgetAt(position))
+                target = self.captured or self.hovered
+                if target is not None and target.onMotion(position, event.buttons[0]): self.captured = target
+
+            # Primary button pressed captures the widget
+            elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
+                self.hover(self.widgetAt(position))
+                self.captured = self.hovered
+                if self.captured is not None: self.captured.onPress(position)
+
+            # Primary button released ends capture
+            elif event.type == pg.MOUSEBUTTONUP and event.button == 1:
+                target, self.captured = self.captured, None
+                hit = self.widgetAt(position)
+                if target is not None: target.onRelease(position, target is hit)
+                self.hover(hit)
+
+    # Handles hover transitions, changing cursor only when needed
+    def hover(self, widget):
+
+        if widget is self.hovered: return
+        previous, self.hovered = self.hovered, widget
+
+        if previous is not None: previous.onLeave()
+        if widget is not None: widget.onEnter()
+
+        cursor = widget.cursor if widget is not None else pg.SYSTEM_CURSOR_ARROW
+        current = previous.cursor if previous is not None else pg.SYSTEM_CURSOR_ARROW
+        if cursor != current: pg.mouse.set_system_cursor(cursor)
+
+    # Clears hover and capture when leaving a scene
+    def reset(self):
+
+        if self.hovered is not None: self.hovered.onLeave()
+        self.hovered = None
+        self.captured = None
+        pg.mouse.set_system_cursor(pg.SYSTEM_CURSOR_ARROW)
@@ -0,0 +1,128 @@
+# Imports
+from src.classes.SampleStore import SampleStore
+import multiprocessing
+import numpy as np
+import queue
+import time
+import os
+
+# Fine tuner class (Retrains model heads on user drawings in a separate process)
+class FineTuner:
+
+    # Constructor
+    def __init__(self, samples, models, output="data/finetune", minSamples=200, headLayers=2, epochs=3,
+    threads=1, budget=0.5, validationSplit=0.2):
+
+        # Passed arguments
+        self.samples = samples
+        self.models = models
+        self.output = output
+        self.minSamples = minSamples
+        self.headLayers = headLayers
+        self.epochs = epochs
+        self.threads = threads
+        self.budget = budget
+        self.validationSplit = validationSplit
+
+        # Implied arguments (Spawned workers never inherit pygame or loaded models)
+        self.context = multiprocessing.get_context("spawn")
+        self.results = self.context.Queue()
+        self.process = None
+        self.trainedCount = 0
+        self.reports = []
+
+    # Path of a model's fine-tuned weights
+    def weightsPath(self, name): return os.path.join(self.output, f"{name}.h5")
+
+    # Starts a worker if enough new drawings arrived and none is running
+    def maybeStart(self):
+
+        if self.process is not None and self.process.is_alive(): return False
+        count = len(self.samples)
+        if count - self.trainedCount < self.minSamples: return False
+
+        os.makedirs(self.output, exist_ok=True)
+        self.trainedCount = count
+        self.process = self.context.Process(target=fineTuneModels, daemon=True, args=(self.samples.directory,
+        self.models, self.output, self.headLayers, self.epochs, self.threads, self.budget,
+        self.validationSplit, count, self.results))
+        self.process.start()
+        return True
+
+    # Returns finished reports without waiting (Called once per frame)
+    def poll(self):
+
+        finished = []
+        while True:
+            try: finished.append(self.results.get_nowait())
+            except queue.Empty: break
+        self.reports.extend(finished)
+        return finished
+
+# Worker entry point, fine-tuning each model in turn
+def fineTuneModels(directory, models, output, headLayers, epochs, threads, budget, validationSplit, seed, results):
+
+    # Stays out of the way of the interface
+    if hasattr(os, "nice"): os.nice(10)
+    import tensorflow as tf
+    from tensorflow import keras
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    # Sleeps after each batch so training uses at most a share of one core
+    class Throttle(keras.callbacks.Callback):
+        def on_train_batch_begin(self, batch, logs=None): self.start = time.perf_counter()
+        def on_train_batch_end(self, batch, logs=None):
+            time.sleep((time.perf_counter() - self.start) * (1 - budget) / budget)
+
+    store = SampleStore(directory)
+    for name, (path, characters) in models.items():
+
+        images, labels = loadSamples(store, characters)
+        if len(labels) < 10:
+            results.put({"model": name, "samples": len(labels), "accepted": False})
+            continue
+
+        # Held-out drawings decide whether new weights are kept
+        order = np.random.default_rng(seed).permutation(len(labels))
+        split = max(1, int(len(order) * validationSplit))
+        validation, training = order[:split], order[split:]
+
+        # Only the last dense layers learn
+        model = keras.models.load_model(path)
+        dense = [layer for layer in model.layers if isinstance(layer, keras.layers.Dense)]
+        for layer in model.layers: layer.trainable = layer in dense[-headLayers:]
+        model.compile(optimizer=keras.optimizers.Adam(1e-4), loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+
+        weights = os.path.join(output, f"{name}.h5")
+        if os.path.exists(weights): model.load_weights(weights)
+
+        baseline = model.evaluate(images[validation], labels[validation], verbose=0)[1]
+        model.fit(images[training], labels[training], epochs=epochs, batch_size=32, verbose=0, callbacks=[Throttle()])
+        accuracy = model.evaluate(images[validation], labels[validation], verbose=0)[1]
+
+        # Weights are replaced atomically so the interface never reads a partial file
+        accepted = accuracy >= baseline
+        if accepted:
+            temporary = os.path.join(output, f"{name}.tmp.h5")
+            model.save_weights(temporary)
+            os.replace(temporary, weights)
+
+        results.put({"model": name, "samples": len(labels), "baseline": baseline, "accuracy": accuracy,
+        "accepted": accepted, "weights": weights})
+
+# Loads every drawing of a model's characters, labeled with the character the user was asked to write (Misread
+# drawings are the ones the model most needs to learn from)
+def loadSamples(store, characters):
+
+    lookup = {ord(character): number for number, character in enumerate(characters)}
+    codes = np.array(list(lookup), dtype=np.uint32)
+    images, labels = [], []
+
+    for pixels, index in store.chunks():
+        keep = np.isin(index["label"], codes)
+        images.append(pixels[keep].reshape(-1, 50, 50, 1) / 255)
+        labels.append(np.array([lookup[code] for code in index["label"][keep]], dtype=np.int32))
+
+    if not images: return np.zeros((0, 50, 50, 1)), np.zeros(0, dtype=np.int32)
+    return np.concatenate(images), np.concatenate(labels)
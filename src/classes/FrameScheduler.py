@@ -0,0 +1,115 @@
+# Imports
+import time
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Frame scheduler class (Shared by every scene loop)
+class FrameScheduler:
+
+    # Event posted by worker threads to wake an idle loop
+    WAKE = pg.USEREVENT + 1
+
+    # Constructor
+    def __init__(self, activeRate=120, idleTimeout=0.5, pausedTimeout=2, grace=0.25):
+
+        # Passed arguments
+        self.activeRate = activeRate
+        self.idleTimeout = idleTimeout
+        self.pausedTimeout = pausedTimeout
+        self.grace = grace
+
+        # Implied arguments
+        self.clock = pg.time.Clock()
+        self.state = "active"
+        self.focused = True
+        self.iconified = False
+        self.awakeUntil = 0
+        self.recorder = None
+
+        # CPU and wall time spent in each state
+        self.stats = {state: {"cpu": 0, "wall": 0, "frames": 0} for state in ("active", "idle", "paused")}
+        self.lastWall = time.perf_counter()
+        self.lastCpu = time.process_time()
+
+    # Keeps full frame rate for a while
+    def keepAwake(self, seconds=None):
+        self.awakeUntil = max(self.awakeUntil, time.perf_counter() + (self.grace if seconds is None else seconds))
+
+    # Wakes a waiting loop from any thread
+    @staticmethod
+    def wake():
+        if pg.display.get_init(): pg.event.post(pg.event.Event(FrameScheduler.WAKE))
+
+    # Wall clock time used by scenes (Replaced by recorded time during replays)
+    def now(self): return time.time()
+
+    # Waits for the next frame and returns pending events
+    def next(self, busy=False):
+
+        self.account()
+
+        # Chooses pacing for this frame
+        if self.iconified or (not self.focused and not busy): self.state = "paused"
+        elif busy or time.perf_counter() < self.awakeUntil: self.state = "active"
+        else: self.state = "idle"
+
+        # Full rate while something is changing
+        if self.state == "active":
+            self.clock.tick(self.activeRate)
+            events = pg.event.get()
+
+        # Blocks until input arrives or the timeout elapses
+        else:
+            timeout = self.idleTimeout if self.state == "idle" else self.pausedTimeout
+            event = pg.event.wait(int(timeout * 1000))
+            events = [] if event.type == pg.NOEVENT else [event] + pg.event.get()
+            self.clock.tick()
+
+        self.handleWindowEvents(events)
+        if self.recorder is not None: self.recorder.write(events)
+        return events
+
+    # Tracks focus and visibility, staying awake after input
+    def handleWindowEvents(self, events):
+
+        for event in events:
+
+            if event.type == pg.WINDOWFOCUSLOST: self.focused = False
+            elif event.type == pg.WINDOWFOCUSGAINED: self.focused = True
+            elif event.type == pg.WINDOWMINIMIZED: self.iconified = True
+            elif event.type in (pg.WINDOWRESTORED, pg.WINDOWSHOWN, pg.WINDOWEXPOSED): self.iconified = False
+
+            # Any input or wake request restores full rate briefly
+            if event.type in (pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP,
+            pg.MOUSEWHEEL, pg.KEYDOWN, pg.KEYUP, pg.WINDOWEXPOSED, FrameScheduler.WAKE):
+                self.keepAwake()
+
+    # Charges elapsed time to the current state
+    def account(self):
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        stats = self.stats[self.state]
+        stats["wall"] += wall - self.lastWall
+        stats["cpu"] += cpu - self.lastCpu
+        stats["frames"] += 1
+        self.lastWall, self.lastCpu = wall, cpu
+
+    # Returns CPU usage and frame rate per state
+    def report(self):
+
+        report = {}
+        for state, stats in self.stats.items():
+            if stats["wall"] <= 0: continue
+            report[state] = {
+                "cpu": stats["cpu"] / stats["wall"] * 100,
+                "fps": stats["frames"] / stats["wall"],
+                "seconds": stats["wall"],
+            }
+        return report
+
+    # Formats usage report for logging
+    def summary(self):
+        return "\n".join(f"{state:>7}: {stats['cpu']:6.2f}% CPU, {stats['fps']:7.2f} FPS over {stats['seconds']:.1f}s"
+        for state, stats in self.report().items())
@@ -0,0 +1,74 @@
+# Imports
+from src.classes.InputRecorder import InputRecorder
+from src.classes.FrameScheduler import FrameScheduler
+from collections import deque
+import threading
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Input player class (Feeds a recording to scene loops on a fixed clock)
+class InputPlayer(FrameScheduler):
+
+    # Constructor
+    def __init__(self, path, settleTimeout=30):
+
+        super().__init__()
+
+        # Passed arguments
+        self.path = path
+        self.settleTimeout = settleTimeout
+
+        # Implied arguments
+        self.batches = []
+        self.frame = 0
+
+        with open(path, "rb") as file: data = file.read()
+        magic, version, self.seed, self.startTime, length, stateLength = InputRecorder.HEADER.unpack_from(data)
+        if magic != InputRecorder.MAGIC or version != InputRecorder.VERSION:
+            raise ValueError(f"{path} is not a version {InputRecorder.VERSION} input recording")
+
+        offset = InputRecorder.HEADER.size
+        self.snapshot = data[offset:offset + length]
+        self.reviews = data[offset + length:offset + length + stateLength]
+        offset += length + stateLength
+
+        # Batches keep their recorded time, which becomes the replay's clock
+        while offset < len(data):
+            timestamp, count = InputRecorder.BATCH.unpack_from(data, offset)
+            offset += InputRecorder.BATCH.size
+            events = []
+            for _ in range(count):
+                events.append(InputRecorder.decode(*InputRecorder.EVENT.unpack_from(data, offset)))
+                offset += InputRecorder.EVENT.size
+            self.batches.append((timestamp, events))
+
+        # An empty frame after every batch lets results from workers land before more input
+        self.queue = deque(frame for timestamp, batch in self.batches for frame in ((timestamp, batch), (timestamp, [])))
+        self.timestamp = 0
+
+    # Writes settings the session started with, for a DataFile to load
+    def writeSettings(self, path):
+        with open(path, "wb") as file: file.write(self.snapshot)
+
+    # Recorded wall clock time of the current frame
+    def now(self): return self.startTime + self.timestamp
+
+    # Waits for worker threads so every frame sees the same results
+    def settle(self):
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread() and not thread.daemon: thread.join(self.settleTimeout)
+
+    # Returns the next recorded batch without waiting on the clock
+    def next(self, busy=False):
+
+        self.account()
+        pg.event.get()
+        self.settle()
+        self.frame += 1
+
+        if self.queue: self.timestamp, events = self.queue.popleft()
+        else: events = [pg.event.Event(pg.QUIT)]
+        self.handleWindowEvents(events)
+        return events
@@ -0,0 +1,78 @@
+# Imports
+import struct
+import time
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Input recorder class (Writes frame event batches to a compact binary file)
+class InputRecorder:
+
+    # File layout
+    MAGIC = b"JPIR"
+    VERSION = 2
+    HEADER = struct.Struct("<4sBIdII")
+    BATCH = struct.Struct("<fH")
+    EVENT = struct.Struct("<HhhiH")
+
+    # Events needed to reproduce a session
+    RECORDED = (pg.QUIT, pg.MOUSEMOTION, pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP, pg.KEYDOWN, pg.KEYUP,
+    pg.WINDOWFOCUSGAINED, pg.WINDOWFOCUSLOST, pg.WINDOWMINIMIZED, pg.WINDOWRESTORED)
+
+    # Constructor
+    def __init__(self, path, seed, settings, reviews):
+
+        # Passed arguments
+        self.path = path
+        self.seed = seed
+
+        # Implied arguments
+        self.start = time.perf_counter()
+        self.batches = 0
+        self.events = 0
+
+        # Header stores the shuffle seed, start time, settings and review state the session started with
+        with open(settings.path, "rb") as file: snapshot = file.read()
+        state = reviews.state()
+        self.file = open(path, "wb")
+        self.file.write(InputRecorder.HEADER.pack(InputRecorder.MAGIC, InputRecorder.VERSION, seed, time.time(),
+        len(snapshot), len(state)))
+        self.file.write(snapshot)
+        self.file.write(state)
+
+    # Appends a frame's events, skipping frames without recorded input
+    def write(self, events):
+
+        events = [event for event in events if event.type in InputRecorder.RECORDED]
+        if not events: return
+
+        self.file.write(InputRecorder.BATCH.pack(time.perf_counter() - self.start, len(events)))
+        for event in events: self.file.write(InputRecorder.EVENT.pack(*InputRecorder.encode(event)))
+        self.batches += 1
+        self.events += len(events)
+
+    # Packs an event into type, position, code and modifiers
+    @staticmethod
+    def encode(event):
+
+        x, y = getattr(event, "pos", (0, 0))
+        if event.type == pg.MOUSEMOTION:
+            code = sum(1 << index for index, held in enumerate(event.buttons) if held)
+        elif event.type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP): code = event.button
+        elif event.type in (pg.KEYDOWN, pg.KEYUP): code = event.key
+        else: code = 0
+        return event.type, int(x), int(y), code, getattr(event, "mod", 0)
+
+    # Rebuilds an event from its packed fields
+    @staticmethod
+    def decode(type, x, y, code, mod):
+
+        if type == pg.MOUSEMOTION:
+            return pg.event.Event(type, pos=(x, y), rel=(0, 0), buttons=tuple((code >> index) & 1 for index in range(3)))
+        if type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP): return pg.event.Event(type, pos=(x, y), button=code)
+        if type in (pg.KEYDOWN, pg.KEYUP): return pg.event.Event(type, key=code, mod=mod)
+        return pg.event.Event(type)
+
+    # Closes recording
+    def close(self): self.file.close()
@@ -0,0 +1,25 @@
+# Imports
+from src.classes.Widget import Widget
+
+# Label class
+class Label(Widget):
+
+    # Constructor
+    def __init__(self, window, position, font, text, color=(255, 255, 255)):
+
+        # Passed arguments
+        super().__init__(window, position, font.size(text))
+        self.font = font
+        self.text = text
+        self.color = color
+
+    # Changes label's text, re-rendering only on change
+    def setText(self, text):
+        if text == self.text: return
+        self.damage.append(self.bounds())
+        self.text = text
+        self.size = self.font.size(text)
+        self.invalidate()
+
+    # Renders label's text into its cached surface
+    def render(self): self.surface = self.font.render(self.text, True, self.color)
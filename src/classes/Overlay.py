@@ -0,0 +1,65 @@
+# Imports
+from src.classes.Widget import Widget
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Overlay class (Debug text drawn above every scene)
+class Overlay(Widget):
+
+    # Constructor
+    def __init__(self, window, visible=False, position=(10, 10), textSize=22):
+
+        # Passed arguments
+        super().__init__(window, position, (0, 0))
+        self.font = window.assets.font("data/latoBlack.ttf", textSize)
+        self.visible = visible
+
+        # Implied arguments
+        self.lines = {}
+        self.padding = 8
+        self.background = (0, 0, 0, 170)
+        self.textColor = (120, 255, 120)
+
+    # Shows or hides overlay
+    def toggle(self): self.setVisible(not self.visible)
+
+    # Sets a named line of text, re-rendering only on change
+    def setLine(self, key, text):
+        if self.lines.get(key) == text: return
+        self.lines[key] = text
+        self.resize()
+
+    # Removes a named line of text
+    def removeLine(self, key):
+        if key not in self.lines: return
+        del self.lines[key]
+        self.resize()
+
+    # Fits overlay around its lines
+    def resize(self):
+        self.damage.append(self.bounds())
+        width = max((self.font.size(text)[0] for text in self.lines.values()), default=0)
+        height = self.font.get_linesize() * len(self.lines)
+        self.size = (width + self.padding * 2, height + self.padding * 2) if self.lines else (0, 0)
+        self.invalidate()
+
+    # Adds overlay on top of a scene if it is not already there
+    def attach(self, scene):
+        if self.parent is scene: return
+        if self.parent is not None: self.parent.children.remove(self)
+        scene.add(self)
+
+    # Renders every line into its cached surface
+    def render(self):
+
+        if not self.lines:
+            self.surface = None
+            return
+
+        self.surface = pg.Surface(self.size, pg.SRCALPHA)
+        self.surface.fill(self.background)
+        for index, text in enumerate(self.lines.values()):
+            self.surface.blit(self.font.render(text, True, self.textColor),
+            (self.padding, self.padding + index * self.font.get_linesize()))
@@ -0,0 +1,39 @@
+# Imports
+from src.classes.Widget import Widget
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Panel class
+class Panel(Widget):
+
+    # Constructor
+    def __init__(self, window, position, size, startColor, endColor=None):
+
+        # Passed arguments
+        super().__init__(window, position, size)
+        self.startColor = startColor
+        self.endColor = endColor
+
+    # Changes panel colors, re-rendering only on change
+    def setColors(self, startColor, endColor=None):
+        if (startColor, endColor) == (self.startColor, self.endColor): return
+        self.startColor = startColor
+        self.endColor = endColor
+        self.invalidate()
+
+    # Renders a solid or horizontal gradient fill
+    def render(self):
+
+        # Solid panel
+        if self.endColor is None:
+            self.surface = pg.Surface(self.size)
+            self.surface.fill(self.startColor)
+            return
+
+        # Gradient panel
+        gradient = pg.Surface((2, 2))
+        pg.draw.line(gradient, self.startColor, (0, 0), (0, 1))
+        pg.draw.line(gradient, self.endColor, (1, 0), (1, 1))
+        self.surface = pg.transform.smoothscale(gradient, self.size)
@@ -0,0 +1,19 @@
+# Imports
+from src.classes.Widget import Widget
+
+# Picture class
+class Picture(Widget):
+
+    # Constructor
+    def __init__(self, window, position, image):
+
+        # Passed arguments
+        super().__init__(window, position, image.get_size())
+        self.surface = image
+
+    # Swaps displayed image
+    def setImage(self, image):
+        self.damage.append(self.bounds())
+        self.surface = image
+        self.size = image.get_size()
+        self.invalidate()
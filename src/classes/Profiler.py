@@ -0,0 +1,139 @@
+# Imports
+from collections import deque
+from contextlib import contextmanager
+import csv
+import time
+from src.classes.Widget import Widget
+
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Profiler class (Per-stage frame timings with a toggleable HUD)
+class Profiler(Widget):
+
+    # Colors assigned to stages in registration order
+    COLORS = [(230, 90, 90), (90, 200, 120), (90, 140, 230), (230, 190, 80),
+    (190, 110, 220), (80, 210, 210), (240, 140, 60), (200, 200, 200)]
+
+    # Constructor
+    def __init__(self, window, visible=False, logging=False, history=200, position=(10, 900)):
+
+        # Passed arguments
+        super().__init__(window, position, (history * 2 + 250, 280))
+        self.visible = visible
+        self.logging = logging
+        self.history = history
+
+        # Implied arguments
+        self.font = window.assets.font("data/latoBlack.ttf", 18)
+        self.stages = {}
+        self.gauges = {}
+        self.current = {}
+        self.frames = deque(maxlen=history)
+        self.samples = []
+        self.frameStart = time.perf_counter()
+        self.lastRender = 0
+        self.refreshRate = 0.1
+        self.scale = 200 / 33.3
+
+    # Registers a stage so it keeps a stable color and column
+    def register(self, name):
+        if name not in self.stages: self.stages[name] = Profiler.COLORS[len(self.stages) % len(Profiler.COLORS)]
+
+    # Registers a value sampled once per frame
+    def gauge(self, name, source): self.gauges[name] = source
+
+    # Times a block of code as part of a stage
+    @contextmanager
+    def stage(self, name):
+        self.register(name)
+        start = time.perf_counter()
+        try: yield
+        finally: self.record(name, (time.perf_counter() - start) * 1000)
+
+    # Adds milliseconds to a stage in the current frame (Safe from worker threads)
+    def record(self, name, milliseconds):
+        self.register(name)
+        self.current[name] = self.current.get(name, 0) + milliseconds
+
+    # Closes the current frame's measurements
+    def endFrame(self):
+
+        now = time.perf_counter()
+        current, self.current = self.current, {}
+        gauges = {name: source() for name, source in self.gauges.items()}
+        frame = {"time": now, "frame": (now - self.frameStart) * 1000, "stages": current, "gauges": gauges}
+        self.frameStart = now
+        self.frames.append(frame)
+        if self.logging: self.samples.append(frame)
+
+        # HUD redraws are throttled so the profiler stays cheap
+        if self.visible and now - self.lastRender >= self.refreshRate:
+            self.lastRender = now
+            self.invalidate()
+
+    # Shows or hides HUD
+    def toggle(self):
+        self.setVisible(not self.visible)
+        if self.visible: self.invalidate()
+
+    # Adds HUD on top of a scene if it is not already there
+    def attach(self, scene):
+        if self.parent is scene: return
+        if self.parent is not None: self.parent.children.remove(self)
+        scene.add(self)
+
+    # Averages of the last frames
+    def averages(self):
+
+        count = max(len(self.frames), 1)
+        frame = sum(sample["frame"] for sample in self.frames) / count
+        stages = {name: sum(sample["stages"].get(name, 0) for sample in self.frames) / count for name in self.stages}
+        return frame, stages
+
+    # Renders stacked stage timings and averages
+    def render(self):
+
+        self.surface = pg.Surface(self.size, pg.SRCALPHA)
+        self.surface.fill((0, 0, 0, 180))
+        graphHeight = self.size[1] - 20
+
+        # Stacked bars, newest on the right
+        for index, sample in enumerate(self.frames):
+            x = 10 + index * 2
+            bottom = graphHeight + 10
+            for name, color in self.stages.items():
+                height = sample["stages"].get(name, 0) * self.scale
+                if height <= 0: continue
+                pg.draw.rect(self.surface, color, (x, bottom - height, 2, height))
+                bottom -= height
+
+        # Frame budget guides at 120 and 60 FPS
+        for budget in (8.33, 16.67):
+            y = graphHeight + 10 - budget * self.scale
+            pg.draw.line(self.surface, (255, 255, 255, 90), (10, y), (10 + self.history * 2, y))
+
+        # Legend with rolling averages
+        frame, stages = self.averages()
+        lines = [(f"frame {frame:.2f} ms  {1000 / frame if frame > 0 else 0:.0f} FPS", (255, 255, 255))]
+        lines += [(f"{name} {milliseconds:.2f} ms", self.stages[name]) for name, milliseconds in stages.items()]
+        if self.frames:
+            lines += [(f"{name} {value}", (200, 200, 200)) for name, value in self.frames[-1]["gauges"].items()]
+
+        for index, (text, color) in enumerate(lines):
+            self.surface.blit(self.font.render(text, True, color),
+            (self.history * 2 + 25, 10 + index * self.font.get_linesize()))
+
+    # Writes logged samples as CSV
+    def dump(self, path):
+
+        stages = list(self.stages)
+        gauges = list(self.gauges)
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["time", "frame"] + stages + gauges)
+            for sample in self.samples:
+                writer.writerow([f"{sample['time']:.6f}", f"{sample['frame']:.3f}"] +
+                [f"{sample['stages'].get(name, 0):.3f}" for name in stages] +
+                [sample["gauges"].get(name, "") for name in gauges])
@@ -0,0 +1,112 @@
+# Imports
+from array import array
+import struct
+import random
+import heapq
+import time
+import os
+
+# Review scheduler class (SM-2 style spaced repetition over integer character IDs)
+class ReviewScheduler:
+
+    # File layout
+    MAGIC = b"JPSR"
+    VERSION = 1
+    HEADER = struct.Struct("<4sBI")
+
+    # Constructor
+    def __init__(self, path, size, clock=time.time, firstInterval=120, secondInterval=900, lapseInterval=30):
+
+        # Passed arguments
+        self.path = path
+        self.size = size
+        self.clock = clock
+        self.firstInterval = firstInterval
+        self.secondInterval = secondInterval
+        self.lapseInterval = lapseInterval
+
+        # Review state, one slot per character ID
+        self.ease = array("f", [2.5]) * size
+        self.interval = array("f", [0]) * size
+        self.due = array("d", [0]) * size
+        self.reps = array("H", [0]) * size
+        self.lapses = array("H", [0]) * size
+
+        # Heap of (due, -weakness, tiebreak, ID) for the characters being studied
+        self.heap = []
+        self.load()
+
+    # Share of reviews that were failed
+    def weakness(self, id): return self.lapses[id] / (self.reps[id] + self.lapses[id] + 1)
+
+    # Heap entry, with a random tiebreak so equal characters come in shuffled order
+    def key(self, id): return (self.due[id], -self.weakness(id), random.random(), id)
+
+    # Restricts reviews to a set of character IDs
+    def select(self, ids):
+        self.heap = [self.key(id) for id in ids]
+        heapq.heapify(self.heap)
+
+    # Character that should be reviewed next (Overdue first, then the weakest)
+    def current(self): return self.heap[0][-1]
+
+    # Grades current character and reschedules it
+    def review(self, correct, duration):
+
+        id = heapq.heappop(self.heap)[-1]
+        quality = 1 if not correct else 5 if duration < 4 else 4 if duration < 10 else 3
+
+        # Ease follows SM-2, never dropping below 1.3
+        self.ease[id] = max(1.3, self.ease[id] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+        # Failed characters restart their intervals and come back soon
+        if quality < 3:
+            self.reps[id] = 0
+            self.lapses[id] = min(self.lapses[id] + 1, 0xFFFF)
+            self.interval[id] = self.lapseInterval
+        else:
+            self.reps[id] = min(self.reps[id] + 1, 0xFFFF)
+            if self.reps[id] == 1: self.interval[id] = self.firstInterval
+            elif self.reps[id] == 2: self.interval[id] = self.secondInterval
+            else: self.interval[id] = self.interval[id] * self.ease[id]
+
+        self.due[id] = self.clock() + self.interval[id]
+        heapq.heappush(self.heap, self.key(id))
+        return id
+
+    # Serializes review state
+    def state(self):
+        return ReviewScheduler.HEADER.pack(ReviewScheduler.MAGIC, ReviewScheduler.VERSION, self.size) + \
+        b"".join(values.tobytes() for values in (self.ease, self.interval, self.due, self.reps, self.lapses))
+
+    # Loads review state, keeping defaults if it is missing or was made for another character list (State saved
+    # before characters were appended fills the first IDs)
+    def restore(self, data):
+
+        if len(data) < ReviewScheduler.HEADER.size: return False
+        magic, version, size = ReviewScheduler.HEADER.unpack_from(data)
+        if magic != ReviewScheduler.MAGIC or version != ReviewScheduler.VERSION or size > self.size: return False
+        itemSize = sum(values.itemsize for values in (self.ease, self.interval, self.due, self.reps, self.lapses))
+        if len(data) != ReviewScheduler.HEADER.size + itemSize * size: return False
+
+        offset = ReviewScheduler.HEADER.size
+        for values in (self.ease, self.interval, self.due, self.reps, self.lapses):
+            length = values.itemsize * size
+            values[:size] = array(values.typecode, data[offset:offset + length])
+            offset += length
+        return True
+
+    # Reads saved state from disk
+    def load(self):
+        if not os.path.exists(self.path): return
+        with open(self.path, "rb") as file: self.restore(file.read())
+
+    # Writes state atomically
+    def save(self):
+
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(self.state())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
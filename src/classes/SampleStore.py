@@ -0,0 +1,110 @@
+# Imports
+import numpy as np
+import threading
+import queue
+import time
+import os
+
+# Sample store class (Append-only, memory-mapped store of 50x50 drawings)
+class SampleStore:
+
+    # One index row per sample, characters are stored as code points
+    INDEX = np.dtype([("label", "<u4"), ("predicted", "<u4"), ("correct", "u1"), ("strokes", "u1"), ("time", "<f8")])
+    SHAPE = (50, 50)
+    CLOSE = None
+
+    # Constructor
+    def __init__(self, directory, chunkSize=4096, capacity=256):
+
+        # Passed arguments
+        self.directory = directory
+        self.chunkSize = chunkSize
+
+        # Implied arguments
+        self.indexPath = os.path.join(directory, "index.bin")
+        self.sampleBytes = SampleStore.SHAPE[0] * SampleStore.SHAPE[1]
+        self.queue = queue.Queue(capacity)
+        self.writer = None
+        self.dropped = 0
+        self.chunk = None
+        self.chunkNumber = -1
+
+        # Existing stores keep the chunk size they were created with
+        if os.path.exists(self.chunkPath(0)): self.chunkSize = os.path.getsize(self.chunkPath(0)) // self.sampleBytes
+
+    # Path of a chunk file
+    def chunkPath(self, number): return os.path.join(self.directory, f"chunk{number:05}.u8")
+
+    # Number of complete samples (Index rows are only written after their pixels)
+    def __len__(self):
+        if not os.path.exists(self.indexPath): return 0
+        return os.path.getsize(self.indexPath) // SampleStore.INDEX.itemsize
+
+    # Queues a drawing without copying it (The array must not be modified afterwards)
+    def append(self, pixels, label, predicted="", correct=False, strokes=0):
+
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.writeLoop, daemon=True)
+            self.writer.start()
+
+        row = (ord(label), ord(predicted) if predicted else 0, correct, min(strokes, 255), time.time())
+        try: self.queue.put_nowait((pixels, row))
+        except queue.Full: self.dropped += 1
+
+    # Maps chunk for writing, preallocating it at full size
+    def openChunk(self, number):
+
+        path = self.chunkPath(number)
+        if not os.path.exists(path):
+            with open(path, "wb") as file: file.truncate(self.chunkSize * self.sampleBytes)
+        self.chunk = np.memmap(path, np.uint8, "r+", shape=(self.chunkSize, *SampleStore.SHAPE))
+        self.chunkNumber = number
+
+    # Copies queued drawings into chunks, then records them in the index
+    def writeLoop(self):
+
+        os.makedirs(self.directory, exist_ok=True)
+        count = len(self)
+        with open(self.indexPath, "ab") as index:
+            while True:
+
+                item = self.queue.get()
+                if item is SampleStore.CLOSE: break
+                pixels, row = item
+
+                number, slot = divmod(count, self.chunkSize)
+                if number != self.chunkNumber:
+                    if self.chunk is not None: self.chunk.flush()
+                    self.openChunk(number)
+                self.chunk[slot] = pixels
+                self.chunk.flush()
+
+                index.write(np.array([row], SampleStore.INDEX).tobytes())
+                index.flush()
+                count += 1
+
+        if self.chunk is not None: self.chunk.flush()
+
+    # Writes queued drawings and stops writer
+    def close(self):
+
+        if self.writer is None: return
+        self.queue.put(SampleStore.CLOSE)
+        self.writer.join()
+        self.writer = None
+
+    # Memory-mapped index of every complete sample
+    def index(self):
+        count = len(self)
+        if count == 0: return np.zeros(0, SampleStore.INDEX)
+        return np.memmap(self.indexPath, SampleStore.INDEX, "r", shape=(count, ))
+
+    # Streams (pixels, index rows) one chunk at a time without loading the store
+    def chunks(self):
+
+        index = self.index()
+        for start in range(0, len(index), self.chunkSize):
+            end = min(start + self.chunkSize, len(index))
+            pixels = np.memmap(self.chunkPath(start // self.chunkSize), np.uint8, "r",
+            shape=(self.chunkSize, *SampleStore.SHAPE))
+            yield pixels[:end - start], index[start:end]
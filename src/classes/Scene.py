@@ -0,0 +1,76 @@
+# Imports
+from src.classes.Widget import Widget
+
+# Scene class (Root of a retained widget tree)
+class Scene(Widget):
+
+    # Constructor
+    def __init__(self, window, background=(0, 0, 0)):
+
+        super().__init__(window, (0, 0), (window.displayX, window.displayY))
+        self.background = background
+        self.fullRedraw = True
+
+        # Fraction of the screen above which a full redraw is cheaper
+        self.fullThreshold = 0.6
+
+    # Changes scene background
+    def setBackground(self, color):
+        if color == self.background: return
+        self.background = color
+        self.invalidate()
+
+    # Damaging the root forces a full redraw
+    def invalidate(self, region=None):
+        if region is None: self.fullRedraw = True
+        else: super().invalidate(region)
+
+    # Redraws damaged regions and returns them
+    def compose(self):
+
+        # Gathers damage from every widget, including hidden ones
+        regions = []
+        for widget in self.walk(hidden=True):
+            regions.extend(widget.collectDamage())
+
+        # Full redraw requested
+        if self.fullRedraw:
+            regions = [self.rect()]
+            self.fullRedraw = False
+        regions = self.mergeRegions(regions)
+
+        # Repaints every widget touching a damaged region
+        display = self.window.display
+        for region in regions:
+            display.set_clip(region)
+            display.fill(self.background, region)
+            for widget in self.walk():
+                if widget is not self and widget.bounds().colliderect(region):
+                    widget.draw(display)
+        display.set_clip(None)
+
+        return regions
+
+    # Joins overlapping regions
+    def mergeRegions(self, regions):
+
+        screen = self.rect()
+        merged = []
+
+        # Clips regions to scene
+        for region in regions:
+            region = region.clip(screen)
+            if region.width == 0 or region.height == 0: continue
+
+            # Absorbs any region touching the new one
+            index = region.collidelist(merged)
+            while index != -1:
+                region.union_ip(merged.pop(index))
+                index = region.collidelist(merged)
+            merged.append(region)
+
+        # Large damage is redrawn at once
+        if sum(region.width * region.height for region in merged) > \
+        screen.width * screen.height * self.fullThreshold:
+            return [screen]
+        return merged
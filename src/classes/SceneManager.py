@@ -0,0 +1,68 @@
+# Imports
+import threading
+import time
+
+# Scene manager class (Keeps scenes alive across switches)
+class SceneManager:
+
+    # Constructor
+    def __init__(self, window, settings, stores, scenes, successors):
+
+        # Passed arguments
+        self.window = window
+        self.settings = settings
+        self.stores = stores
+        self.scenes = scenes
+        self.successors = successors
+
+        # Implied arguments
+        self.states = {}
+        self.loaders = {}
+        self.transitions = []
+
+    # Builds a scene's state (Runs on the main thread, as widgets render fonts and surfaces)
+    def build(self, name):
+        self.states[name] = self.scenes[name].generateUI(self.window, self.settings, self.stores)
+
+    # Loads a scene's slow assets in the background if it does not exist yet (Only thread-safe work, such as models)
+    def prebuild(self, name):
+
+        if name in self.states or name in self.loaders: return
+        assets = getattr(self.scenes[name], "PREBUILD", [])
+        self.loaders[name] = threading.Thread(target=self.window.assets.loadAll, args=(assets, ), daemon=True)
+        self.loaders[name].start()
+
+    # Returns a scene's state, building it if needed
+    def get(self, name):
+
+        # Scene is alive from a previous visit
+        if name in self.states: return self.states[name], "cached"
+
+        # Widgets that need prebuilt assets wait for them on their own threads
+        self.build(name)
+        return self.states[name], "prepared" if self.loaders.pop(name, None) is not None else "built"
+
+    # Runs scenes until one requests to quit
+    def run(self, name):
+
+        running = True
+        previous = "start"
+        while running:
+
+            # Switches to scene, preserving its previous state
+            start = time.perf_counter()
+            ui, source = self.get(name)
+            self.scenes[name].enter(self.window, self.settings, ui)
+            self.window.overlay.attach(ui["scene"])
+            self.window.profiler.attach(ui["scene"])
+            elapsed = (time.perf_counter() - start) * 1000
+
+            # Reports transition time
+            self.transitions.append((previous, name, source, elapsed))
+            self.window.overlay.setLine("transition", f"{previous} -> {name}: {elapsed:.1f} ms ({source})")
+
+            # Prepares the next likely scene while this one runs
+            if name in self.successors: self.prebuild(self.successors[name])
+
+            previous = name
+            running, name = self.scenes[name].boot(self.window, self.settings, ui)
@@ -1,98 +1,101 @@
 # Imports
+from src.classes.Widget import Widget
+
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame as pg
 
 # Slider class
-class Slider:
+class Slider(Widget):
 
     # Constructor
-    def __init__(self, window, position, size, initialFill=0, **kwargs):
+    def __init__(self, window, position, size, initialFill=0, action=None, **kwargs):
 
         # Builds most constructor arguments
+        super().__init__(window, position, size)
         self.reconstruct(window, position, size, kwargs, initialFill)
+        self.action = action
 
         # Non real-time arguments
         self.positionComparator = self.position
         self.sizeComparator = self.size
-        self.queueComparator = True
         self.status = "base"
-    
-    # Updates button's status
-    def update(self, position, pressed, released):
-
-        # Slider is being hovered
-        self.last = self.fill
-        if self.positionComparator[0] < position[0] < self.positionComparator[0] + self.sizeComparator[0] and \
-        self.positionComparator[1] < position[1] < self.positionComparator[1] + self.sizeComparator[1]:
-
-            pg.mouse.set_system_cursor(pg.SYSTEM_CURSOR_HAND)
-            self.hovering = True
-
-            # Defines button visuals
-            if pressed[0] and not self.lastHeld: self.status = "held"
-
-            # We want to update the comparator
-            if self.queueComparator:
-                self.positionComparator = self.position
-                self.sizeComparator = self.size
-                self.queueComparator = False
-
-            # Slider is no longer held
-            if released == 1:
-                self.status = "base"
-                self.positionComparator = self.position
-                self.sizeComparator = self.size
-                self.queueComparator = True
-
-        # Slider stopped being hovered
-        elif self.hovering:
-
-            pg.mouse.set_system_cursor(pg.SYSTEM_CURSOR_ARROW)
-            self.hovering = False
-            if released == 1: self.status = "base"
-
-        # Slider was released
-        elif released == 1:
-            self.status = "base"
-            self.positionComparator = self.position
-            self.sizeComparator = self.size
-            self.queueComparator = True
-
-        # Updates status
-        if self.status == "held":
-            self.fill = max(min(position[0] - self.positionComparator[0], self.sizeComparator[0]), 0)
-            self.percent = self.fill / self.sizeComparator[0]
-        if self.fill != self.last: self.changed = True
-        self.lastHeld = pressed[0]
-
-        self.draw()
-
-    # Draws Slider's status
-    def draw(self):
+        self.interactive = True
+        self.cursor = pg.SYSTEM_CURSOR_HAND
+
+    # Slider is being hovered
+    def onEnter(self): self.hovering = True
+
+    # Slider stopped being hovered
+    def onLeave(self): self.hovering = False
+
+    # Slider is grabbed, freezing its comparator until released
+    def onPress(self, position):
+        self.status = "held"
+        self.positionComparator = self.position
+        self.sizeComparator = self.size
+        self.slide(position)
+
+    # Slider is dragged
+    def onMotion(self, position, held):
+        if self.status == "held": self.slide(position)
+
+    # Slider was released
+    def onRelease(self, position, inside):
+        self.status = "base"
+        self.positionComparator = self.position
+        self.sizeComparator = self.size
+
+    # Moves pointer to position, sending its action on change
+    def slide(self, position):
+
+        fill = max(min(position[0] - self.positionComparator[0], self.sizeComparator[0]), 0)
+        if fill == self.fill: return
+
+        self.fill = fill
+        self.percent = self.fill / self.sizeComparator[0]
+        self.changed = True
+        self.invalidate()
+        if self.action is not None: self.action(self.percent)
+
+    # Area affected by the track and the overhanging pointer
+    def bounds(self):
+        return pg.Rect(self.position[0] - self.size[1] / 2, self.position[1], self.size[0] + self.size[1], self.size[1])
+
+    # Renders Slider's status into its cached surface
+    def render(self):
+
+        if self.surface is None: self.surface = pg.Surface(self.bounds().size, pg.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        offset = self.size[1] / 2
 
         # Draws track
-        pg.draw.rect(self.window.display, self.visuals["colorBase"],
-        pg.Rect(self.position[0], self.position[1] + self.visuals["trackMargin"], self.size[0],
+        pg.draw.rect(self.surface, self.visuals["colorBase"],
+        pg.Rect(offset, self.visuals["trackMargin"], self.size[0],
         self.size[1] - self.visuals["trackMargin"] * 2), border_radius=self.visuals["trackRadius"])
 
-        # Displays comparator position for debugging
-        if self.visuals["debugComparator"]:
-            pg.draw.rect(self.window.display, (0, 0, 255), pg.Rect(self.positionComparator[0],
-            self.positionComparator[1], self.sizeComparator[0], self.sizeComparator[1]), 1)
-
         # Draws track shadow
-        pg.draw.rect(self.window.display, self.visuals["colorShadow"],
-        pg.Rect(self.position[0], self.position[1] + self.visuals["trackMargin"], self.percent * self.size[0],
+        pg.draw.rect(self.surface, self.visuals["colorShadow"],
+        pg.Rect(offset, self.visuals["trackMargin"], self.percent * self.size[0],
         self.size[1] - self.visuals["trackMargin"] * 2), border_radius=self.visuals["trackRadius"])
 
         # Draws pointer
-        pg.draw.rect(self.window.display, self.visuals["colorPointer"],
-        pg.Rect(self.position[0] + self.percent * self.size[0] + self.visuals["pointerMargin"] - self.size[1] / 2,
-        self.position[1] + self.visuals["pointerMargin"],
+        pg.draw.rect(self.surface, self.visuals["colorPointer"],
+        pg.Rect(self.percent * self.size[0] + self.visuals["pointerMargin"],
+        self.visuals["pointerMargin"],
         self.size[1] - self.visuals["pointerMargin"] * 2, self.size[1] - self.visuals["pointerMargin"] * 2),
         border_radius=self.visuals["pointerRadius"])
 
+    # Composites Slider onto a target surface
+    def draw(self, target):
+
+        target.blit(self.getSurface(), self.bounds())
+
+        # Displays comparator position for debugging
+        if self.visuals["debugComparator"]:
+            pg.draw.rect(target, (0, 0, 255), pg.Rect(self.positionComparator[0],
+            self.positionComparator[1], self.sizeComparator[0], self.sizeComparator[1]), 1)
+
     # Handles constructor arguments for real-time changes
     def reconstruct(self, window, position, size, kwargs, initialFill=0):
 
@@ -100,12 +103,13 @@ class Slider:
         self.window = window
         self.position = position
         self.size = size
+        self.surface = None
+        self.invalidate()
 
         # Implied arguments
         self.hovering = False
         self.fill = initialFill
         self.percent = initialFill / size[0]
-        self.lastHeld = False
         self.changed = False
 
         # Default visual arguments
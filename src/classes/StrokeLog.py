@@ -0,0 +1,120 @@
+# Imports
+from array import array
+import zlib
+
+# Stroke log class (Append-only, array-backed drawing history)
+class StrokeLog:
+
+    # Tools stored per entry
+    BRUSH = 0
+    ERASER = 1
+    WIPE = 2
+
+    # Constructor
+    def __init__(self, keyframeInterval=32):
+
+        # Passed arguments
+        self.keyframeInterval = keyframeInterval
+
+        # Points of every entry, stored back to back
+        self.xs = array("h")
+        self.ys = array("h")
+
+        # One row per entry
+        self.starts = array("I")
+        self.sizes = array("B")
+        self.tools = array("B")
+
+        # Entries after length are kept for redo
+        self.length = 0
+        self.keyframes = {}
+
+    # Number of entries, including undone ones
+    def __len__(self): return len(self.starts)
+
+    # Appends an entry, discarding any undone history
+    def append(self, points, size, tool):
+
+        self.truncate()
+        self.starts.append(len(self.xs))
+        self.sizes.append(size)
+        self.tools.append(tool)
+        for x, y in points:
+            self.xs.append(int(x))
+            self.ys.append(int(y))
+        self.length += 1
+
+    # Drops undone entries and their keyframes
+    def truncate(self):
+
+        if self.length == len(self.starts): return
+        end = self.starts[self.length]
+        del self.xs[end:], self.ys[end:]
+        del self.starts[self.length:], self.sizes[self.length:], self.tools[self.length:]
+        self.keyframes = {count: data for count, data in self.keyframes.items() if count <= self.length}
+
+    # Returns an entry's points, size and tool
+    def entry(self, index):
+        start = self.starts[index]
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else len(self.xs)
+        return list(zip(self.xs[start:end], self.ys[start:end])), self.sizes[index], self.tools[index]
+
+    # Number of strokes drawn since the last wipe, ignoring undone ones
+    def strokeCount(self):
+        count = 0
+        for tool in self.tools[:self.length]: count = 0 if tool == StrokeLog.WIPE else count + 1
+        return count
+
+    # Determines if a keyframe should follow the latest entry
+    def wantsKeyframe(self):
+        return self.length % self.keyframeInterval == 0 and self.length not in self.keyframes
+
+    # Stores a compressed snapshot of the state after count entries
+    def addKeyframe(self, count, pixels): self.keyframes[count] = zlib.compress(pixels, 1)
+
+    # Finds the closest known state at or before count entries
+    def base(self, count):
+
+        # Wipes are free keyframes of a blank canvas
+        best = 0
+        for index in range(count - 1, -1, -1):
+            if self.tools[index] == StrokeLog.WIPE:
+                best = index + 1
+                break
+
+        # Keyframes beat earlier wipes
+        keyframe = max((key for key in self.keyframes if best < key <= count), default=None)
+        if keyframe is None: return best, None
+        return keyframe, zlib.decompress(self.keyframes[keyframe])
+
+    # Moves back one entry
+    def undo(self):
+        if self.length == 0: return False
+        self.length -= 1
+        return True
+
+    # Moves forward one entry
+    def redo(self):
+        if self.length == len(self.starts): return False
+        self.length += 1
+        return True
+
+    # Forgets all history
+    def clear(self):
+        self.length = 0
+        self.truncate()
+        self.keyframes = {}
+
+    # Reports memory used by entries and keyframes
+    def memory(self):
+
+        points = len(self.xs)
+        entries = (self.xs.itemsize + self.ys.itemsize) * points + \
+        (self.starts.itemsize + self.sizes.itemsize + self.tools.itemsize) * len(self.starts)
+        keyframes = sum(len(data) for data in self.keyframes.values())
+        return {
+            "points": points,
+            "entries": entries,
+            "keyframes": keyframes,
+            "bytesPerPoint": (entries + keyframes) / points if points else 0,
+        }
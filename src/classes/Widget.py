@@ -0,0 +1,100 @@
+# Imports
+import os
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+import pygame as pg
+
+# Widget class
+class Widget:
+
+    # Constructor
+    def __init__(self, window, position, size):
+
+        # Passed arguments
+        self.window = window
+        self.position = position
+        self.size = size
+
+        # Retained state
+        self.surface = None
+        self.dirty = True
+        self.damage = []
+        self.visible = True
+        self.parent = None
+        self.children = []
+
+        # Input routing
+        self.interactive = False
+        self.cursor = pg.SYSTEM_CURSOR_ARROW
+
+    # Adds child widgets, drawn above this widget in insertion order
+    def add(self, *children):
+        for child in children:
+            child.parent = self
+            self.children.append(child)
+        return self
+
+    # Iterates over the widget tree in drawing order
+    def walk(self, hidden=False):
+        if not self.visible and not hidden: return
+        yield self
+        for child in self.children:
+            yield from child.walk(hidden)
+
+    # Area covered by the widget
+    def rect(self): return pg.Rect(*self.position, *self.size)
+
+    # Area affected when the widget is redrawn
+    def bounds(self): return self.rect()
+
+    # Marks the widget for redrawing
+    def invalidate(self, region=None):
+        self.dirty = True
+        self.damage.append(pg.Rect(region) if region is not None else self.bounds())
+
+    # Moves the widget and damages both old and new areas
+    def move(self, position):
+        if tuple(position) == tuple(self.position): return
+        self.damage.append(self.bounds())
+        self.position = position
+        self.invalidate()
+
+    # Shows or hides the widget
+    def setVisible(self, visible):
+        if visible == self.visible: return
+        self.visible = visible
+        self.damage.append(self.bounds())
+
+    # Returns and clears pending damage
+    def collectDamage(self):
+        damage, self.damage = self.damage, []
+        return damage
+
+    # Rebuilds cached surface (Overridden by widgets)
+    def render(self): pass
+
+    # Returns cached surface, rendering it only when dirty
+    def getSurface(self):
+        if self.dirty:
+            self.render()
+            self.dirty = False
+        return self.surface
+
+    # Composites widget onto a target surface
+    def draw(self, target):
+        surface = self.getSurface()
+        if surface is not None: target.blit(surface, self.position)
+
+    # Pointer entered widget (Overridden by interactive widgets)
+    def onEnter(self): pass
+
+    # Pointer left widget
+    def onLeave(self): pass
+
+    # Primary button pressed over widget
+    def onPress(self, position): pass
+
+    # Pointer moved over widget, or anywhere while widget holds capture (Returns True to capture a drag it picked up)
+    def onMotion(self, position, held): pass
+
+    # Primary button released after pressing widget
+    def onRelease(self, position, inside): pass
@@ -1,4 +1,9 @@
 # Imports
+from src.classes.FrameScheduler import FrameScheduler
+from src.classes.AssetManager import AssetManager
+from src.classes.Profiler import Profiler
+from src.classes.Overlay import Overlay
+
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame as pg
@@ -23,12 +28,34 @@ class Window:
 
         self.updateDisplay()
         self.display = pg.Surface((self.displayX, self.displayY))
+        self.scheduler = FrameScheduler()
+        self.assets = AssetManager(self)
+        self.overlay = Overlay(self, settings.get("debugOverlay"))
+        self.profiler = Profiler(self, settings.get("profilerHud"), settings.get("profilerLog"))
+
+    # Updates window surfaces, optionally limited to damaged regions
+    def update(self, regions=None):
+
+        # Full frame
+        if regions is None or self.display.get_rect() in regions:
+            self.screen.blit(pg.transform.smoothscale(self.display, (self.screenX, self.screenY)), (0, 0))
+            pg.display.flip()
+            return
+
+        # Scales each region separately, padded to hide filtering seams
+        updated = []
+        for region in regions:
+            scaled = pg.Rect(int(region.x / self.aspectX), int(region.y / self.aspectY),
+            int(region.width / self.aspectX) + 2, int(region.height / self.aspectY) + 2)
+            scaled = scaled.inflate(2, 2).clip(self.screen.get_rect())
+            source = pg.Rect(scaled.x * self.aspectX, scaled.y * self.aspectY,
+            scaled.width * self.aspectX, scaled.height * self.aspectY).clip(self.display.get_rect())
+            if source.width == 0 or source.height == 0: continue
 
-    # Updates window surfaces
-    def update(self):
+            self.screen.blit(pg.transform.smoothscale(self.display.subsurface(source), scaled.size), scaled)
+            updated.append(scaled)
 
-        self.screen.blit(pg.transform.smoothscale(self.display, (self.screenX, self.screenY)), (0, 0))
-        pg.display.flip()
+        if updated: pg.display.update(updated)
 
     # Resizes resolution shown
     def resize(self, x=-1, y=-1):
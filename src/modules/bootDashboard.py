@@ -1,126 +1,196 @@
 # Imports
+from src.classes.Dispatcher import Dispatcher
+from src.classes.FineTuner import FineTuner
 from src.classes.Canvas import Canvas
 from src.classes.Button import Button
 from src.classes.Slider import Slider
+from src.classes.Cursor import Cursor
+from src.classes.Label import Label
+from src.classes.Scene import Scene
 from src.modules.dictionary import *
-from random import shuffle
 
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame as pg
 
-# Initializes dashboard scene
-def boot(window, settings):
+# Assets used by the scene, preloaded at startup
+ASSETS = [
+    ("font", "data/tsunagiGothic.ttf", 30),
+    ("font", "data/tsunagiGothic.ttf", 40),
+    ("font", "data/tsunagiGothic.ttf", 50),
+    ("font", "data/tsunagiGothic.ttf", 130),
+    ("font", "data/latoBlack.ttf", 30),
+]
 
-    # Scene variables
-    clock = pg.time.Clock()
-    ui = generateUI(window, settings)
-
-    studyCollection = []
-    score = [0, 0]
-
-    # Adds hiragana characters
-    if settings.get("studyHiragana"):
-        studyCollection.extend("HI" + character for character in HIRAGANA)
+# Assets loaded in the background while the previous scene runs
+PREBUILD = [
+    ("model", "model/hkModel", None),
+    ("model", "model/n5Model", None),
+]
 
-    # Adds katakana characters
-    if settings.get("studyKatakana"):
-        studyCollection.extend("KA" + character for character in KATAKANA)
+# Models retrained on the user's drawings and the canvas attributes holding them
+TUNED_MODELS = {"hkModel": "kanaModel", "n5Model": "n5Model"}
 
-    # Adds kanji characters
-    if settings.get("studyKanji"):
-        studyCollection.extend("N5" + character for character in N5KANJI)
+# Runs dashboard scene
+def boot(window, settings, ui):
 
-    fullCollection = studyCollection.copy()
-    shuffle(studyCollection)
-    ui["canvas"].boostCharacter(studyCollection[0][-1])
+    # Scene variables
+    busy = False
 
     # Main scene loop
     while True:
 
-        # Event handling
-        position, pressed, released = getMouse(window)
-        for event in pg.event.get():
+        # Event handling (Blocks while idle)
+        events = window.scheduler.next(busy)
+        with window.profiler.stage("events"):
+            for event in events:
 
-            # Cross is pressed
-            if event.type == pg.QUIT: return False, ""
+                # Cross is pressed
+                if event.type == pg.QUIT: return False, ""
 
-            # Mouse button is released
-            if event.type == pg.MOUSEBUTTONUP: released = event.button
+                # Debug overlay and profiler toggles
+                if event.type == pg.KEYDOWN and event.key == pg.K_F3: window.overlay.toggle()
+                if event.type == pg.KEYDOWN and event.key == pg.K_F2: window.profiler.toggle()
 
-        # Updates window
-        response = handleUI(window, settings, ui, position, pressed, released, studyCollection, score, fullCollection)
-        if response != None: return response
-        window.update()
-        window.fill(settings.get("menuGray2"))
-        clock.tick(120)
+                # Undo and redo drawing history
+                if event.type == pg.KEYDOWN and event.mod & pg.KMOD_CTRL:
+                    if event.key == pg.K_z and event.mod & pg.KMOD_SHIFT: ui["canvas"].redo()
+                    elif event.key == pg.K_z: ui["canvas"].undo()
+                    elif event.key == pg.K_y: ui["canvas"].redo()
 
-# Refreshes mouse information
-def getMouse(window):
+                # Escape returns to menu, keeping this scene alive
+                if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
+                    ui["dispatcher"].reset()
+                    return True, "trainer"
 
-    # Mouse position
-    position = list(pg.mouse.get_pos())
-    position[0] = position[0] * window.aspectX
-    position[1] = position[1] * window.aspectY
+        # Routes input to widgets, which respond through their actions
+        with window.profiler.stage("handleUI"): ui["dispatcher"].dispatch(events)
+        if ui["response"] != None:
+            ui["dispatcher"].reset()
+            return ui["response"]
 
-    # Mouse interactivity
-    pressed = pg.mouse.get_pressed()
-    released = 0
-
-    return position, pressed, released
+        # Updates window
+        with window.profiler.stage("canvas"): ui["canvas"].update()
+
+        # Swaps in fine-tuned weights that beat the current ones
+        if ui["tuner"] is not None:
+            for report in ui["tuner"].poll():
+                if report["accepted"]: ui["canvas"].swapWeights(TUNED_MODELS[report["model"]], report["weights"])
+                window.overlay.setLine(f"tuning {report['model']}",
+                f"{report['model']}: {report.get('baseline', 0):.3f} -> {report.get('accuracy', 0):.3f} "
+                f"on {report['samples']} drawings ({'kept' if report['accepted'] else 'discarded'})")
+        with window.profiler.stage("widgets"): regions = ui["scene"].compose()
+        with window.profiler.stage("present"): window.update(regions)
+        window.profiler.endFrame()
+        busy = ui["dispatcher"].captured is not None
 
 # Generates ui elements
-def generateUI(window, settings):
+def generateUI(window, settings, stores):
 
     ui = {
 
-        "fontHeader": pg.font.Font("data/tsunagiGothic.ttf", 50),
-        "fontSubheader": pg.font.Font("data/tsunagiGothic.ttf", 40),
-        "fontBody": pg.font.Font("data/tsunagiGothic.ttf", 30),
+        "history": stores["history"],
+        "samples": stores["samples"],
+        "reviews": stores["reviews"],
+
+        "response": None,
+        "selection": None,
+        "target": "",
+        "score": [0, 0],
+        "shownAt": 0,
+
+        "fontHeader": window.assets.font("data/tsunagiGothic.ttf", 50),
+        "fontSubheader": window.assets.font("data/tsunagiGothic.ttf", 40),
+        "fontBody": window.assets.font("data/tsunagiGothic.ttf", 30),
 
         "canvas": Canvas(window, (100, 100), (1000, 1000)), 
         "sliders": [
             Slider(window, (1150, 625), (200, 50), initialFill=100, colorBase=(55, 55, 55),
             colorPointer=(35,135,230), colorShadow=(40,85,235), trackMargin=17, trackRadius=10,
-            pointerMargin=10, pointerRadius=15),
+            pointerMargin=10, pointerRadius=15, action=lambda percent: setBrushSize(ui, percent)),
 
             Slider(window, (1700, 1055), (180, 50), initialFill=90, colorBase=(55, 55, 55),
             colorPointer=(35,135,230), colorShadow=(40,85,235), trackMargin=17, trackRadius=10,
-            pointerMargin=10, pointerRadius=15)
+            pointerMargin=10, pointerRadius=15, action=lambda percent: setPredictionEase(ui, percent))
         ],
         "buttons": [
             Button(window, (1150, 325), (200, 75), colorBase=settings.get("menuGray4"),
             colorHighlight=settings.get("menuGray5"), colorClick=settings.get("menuGray3"),
-            borderRadius=10, drawText=True, text="Brush", textSize=30),
+            borderRadius=10, drawText=True, text="Brush", textSize=30,
+            action=lambda: selectTool(ui, 0, (0, 0, 0))),
 
             Button(window, (1150, 425), (200, 75), colorBase=settings.get("menuGray4"),
             colorHighlight=settings.get("menuGray5"), colorClick=settings.get("menuGray3"),
-            borderRadius=10, drawText=True, text="Eraser", textSize=30),
+            borderRadius=10, drawText=True, text="Eraser", textSize=30,
+            action=lambda: selectTool(ui, 1, ui["canvas"].backgroundColor)),
 
             Button(window, (1150, 525), (200, 75), colorBase=settings.get("menuGray4"),
             colorHighlight=settings.get("menuGray5"), colorClick=settings.get("menuGray3"),
-            borderRadius=10, drawText=True, text="Wipe", textSize=30),
+            borderRadius=10, drawText=True, text="Wipe", textSize=30,
+            action=lambda: ui["canvas"].wipeCanvas()),
 
             Button(window, (1150, 1025), (200, 75), colorBase=settings.get("menuGray4"),
             colorHighlight=settings.get("menuGray5"), colorClick=settings.get("menuGray3"),
-            borderRadius=10, drawText=True, text="Submit", textSize=30),
+            borderRadius=10, drawText=True, text="Submit", textSize=30,
+            action=lambda: submit(window, ui)),
         ]
     }
 
-    ui["buttons"][0].lock = "active"
-    ui["header"] = ui["fontHeader"].render("Write the Following:", True, (255, 255, 255))
-
-    ui["settingsHeader"] = ui["fontHeader"].render("Settings:", True, (255, 255, 255))
+    ui["buttons"][0].setLock("active")
+    ui["cursor"] = Cursor(window, ui["canvas"].brushSize // 2)
+    ui["labels"] = {
+        "header": Label(window, (1440, 100), ui["fontHeader"], "Write the Following:"),
+        "target": Label(window, (1440, 160), ui["fontSubheader"], ""),
+        "correct": Label(window, (1440, 220), ui["fontBody"], ""),
+        "incorrect": Label(window, (1440, 250), ui["fontBody"], ""),
+        "accuracy": Label(window, (1440, 280), ui["fontBody"], ""),
+        "settingsHeader": Label(window, (1440, 980), ui["fontHeader"], "Settings:"),
+        "predictionEaseSetting": Label(window, (1440, 1060), ui["fontBody"], "Prediction Ease:"),
+    }
 
-    ui["predictionEaseSetting"] = ui["fontBody"].render("Prediction Ease:", True, (255, 255, 255))
+    # Widgets are composited in the order they are added
+    ui["scene"] = Scene(window, settings.get("menuGray2")).add(*ui["labels"].values(),
+    ui["canvas"], *ui["sliders"], *ui["buttons"], ui["cursor"])
+    ui["dispatcher"] = Dispatcher(window, ui["scene"]).listen(ui["cursor"].follow)
+    ui["tuner"] = FineTuner(ui["samples"], {"hkModel": ("model/hkModel", HIRAGANA + KATAKANA),
+    "n5Model": ("model/n5Model", N5KANJI)}) if settings.get("fineTuning") else None
+    window.profiler.gauge("inference queue", ui["canvas"].queueDepth)
+    window.profiler.gauge("inference ms", lambda: f"{ui['canvas'].inferenceTime:.1f}")
 
     return ui
 
-# Handles input and visualization
-def handleUI(window, settings, ui, position, pressed, released, studyCollection, score, fullCollection):
+# Resumes scene, keeping score and queue unless the studied sets changed
+def enter(window, settings, ui):
+
+    ui["response"] = None
+    selection = (settings.get("studyHiragana"), settings.get("studyKatakana"), settings.get("studyKanji"))
+    if selection != ui["selection"]:
+        ui["selection"] = selection
+        buildCollection(window, ui, settings)
+    ui["scene"].invalidate()
+
+# Restricts reviews to the selected sets
+def buildCollection(window, ui, settings):
+
+    prefixes = [prefix for prefix, key in (("HI", "studyHiragana"), ("KA", "studyKatakana"), ("N5", "studyKanji"))
+    if settings.get(key)]
+    ui["reviews"].select([id for id, item in enumerate(STUDY_ITEMS) if item[:2] in prefixes])
+    ui["canvas"].resetCanvas()
+    showTarget(window, ui)
+
+# Shows the character due for review next
+def showTarget(window, ui):
+
+    ui["target"] = STUDY_ITEMS[ui["reviews"].current()]
+    ui["canvas"].boostCharacter(ui["target"][-1])
+    ui["shownAt"] = window.scheduler.now()
+    updateLabels(ui)
+
+# Refreshes target and statistics (Labels only re-render on change)
+def updateLabels(ui):
 
-    window.blit(ui["header"], (1440, 100))
-    target = studyCollection[0][-1]
+    target = ui["target"][-1]
+    score = ui["score"]
 
     # Determines character to be written
     if target in HIRAGANA: predictionMessage = "Hiragana: " + KANA_MAP[HIRAGANA.index(target)].capitalize()
@@ -128,64 +198,53 @@ def handleUI(window, settings, ui, position, pressed, released, studyCollection,
     elif target in N5KANJI: predictionMessage = "N5 Kanji: " + N5KANJI_MAP[N5KANJI.index(target)].capitalize().split(",")[0]
 
     # Prints statistics
-    window.blit(ui["fontSubheader"].render(predictionMessage, True, (255, 255, 255)), (1440, 160))
-    window.blit(ui["fontBody"].render(f"Correct: {score[0]}", True, (255, 255, 255)), (1440, 220))
-    window.blit(ui["fontBody"].render(f"Incorrect: {score[1]}", True, (255, 255, 255)), (1440, 250))
-
-    seenCount = len(fullCollection)-len(studyCollection)
-    window.blit(ui["fontBody"].render(
-    f"Accuracy: {score[0]/seenCount*100 if seenCount > 0 else 100:.02f}%", True, (255, 255, 255)), (1440, 280))
-
-    window.blit(ui["settingsHeader"], (1440, 980))
-    window.blit(ui["predictionEaseSetting"], (1440, 1060))
-
-    # Updates and draws button objects
-    for button in ui["buttons"]: button.update(position, pressed, released)
-    for slider in ui["sliders"]: slider.update(position, pressed, released)
-    
-    # Updates and draws canvas objects
-    ui["canvas"].update(position, pressed)
-
-    return handleInput(ui, studyCollection, score, fullCollection)
-
-# Handles button behavior
-def handleInput(ui, studyCollection, score, fullCollection):
-
-    # Brush button
-    if ui["buttons"][0].send:
-        unlockButtons(ui["buttons"])
-        ui["buttons"][0].lock = "active"
-        ui["canvas"].brushColor = (0, 0, 0)
-
-    # Eraser button
-    if ui["buttons"][1].send:
-        unlockButtons(ui["buttons"])
-        ui["buttons"][1].lock = "active"
-        ui["canvas"].brushColor = ui["canvas"].backgroundColor
-
-    # Wipe button
-    if ui["buttons"][2].send:
-        ui["canvas"].wipeCanvas()
-
-    # Submit button
-    if ui["buttons"][3].send and ui["canvas"].prediction != "":
-
-        # Determines validity of prediction
-        if ui["canvas"].prediction == studyCollection[0][-1]: score[0] += 1
-        else: score[1] += 1
-
-        # Resets collection if empty
-        studyCollection.append(studyCollection.pop(0))
-        ui["canvas"].boostCharacter(studyCollection[0][-1])
-        ui["canvas"].wipeCanvas()
-
-    # Brush size slider
-    if ui["sliders"][0].changed:
-        ui["canvas"].brushSize = int(20 + 60 * ui["sliders"][0].percent)
-    
-    # Prediction ease slider
-    if ui["sliders"][1].changed:
-        ui["canvas"].boostMagnitude = 0.4 * ui["sliders"][0].percent
+    ui["labels"]["target"].setText(predictionMessage)
+    ui["labels"]["correct"].setText(f"Correct: {score[0]}")
+    ui["labels"]["incorrect"].setText(f"Incorrect: {score[1]}")
+
+    seenCount = score[0] + score[1]
+    ui["labels"]["accuracy"].setText(f"Accuracy: {score[0]/seenCount*100 if seenCount > 0 else 100:.02f}%")
+
+# Brush and eraser buttons
+def selectTool(ui, index, color):
+    unlockButtons(ui["buttons"])
+    ui["buttons"][index].setLock("active")
+    ui["canvas"].brushColor = color
+
+# Submit button
+def submit(window, ui):
+
+    target = ui["target"]
+    canvas = ui["canvas"]
+    if canvas.prediction == "": return
+
+    # Determines validity of prediction
+    correct = canvas.prediction == target[-1]
+    if correct: ui["score"][0] += 1
+    else: ui["score"][1] += 1
+
+    # Queues attempt for the history database and reschedules character
+    duration = window.scheduler.now() - ui["shownAt"]
+    ui["history"].record(target[:2], target[-1], canvas.prediction, canvas.topPredictions,
+    canvas.boostMagnitude, duration, canvas.history.strokeCount())
+    ui["reviews"].review(correct, duration)
+
+    # Keeps drawing for fine-tuning (Pixels are handed over, not copied)
+    if canvas.pixels is not None:
+        ui["samples"].append(canvas.pixels, target[-1], canvas.prediction, correct, canvas.history.strokeCount())
+        if ui["tuner"] is not None: ui["tuner"].maybeStart()
+
+    canvas.resetCanvas()
+    showTarget(window, ui)
+
+# Brush size slider
+def setBrushSize(ui, percent):
+    ui["canvas"].brushSize = int(20 + 60 * percent)
+    ui["cursor"].setRadius(ui["canvas"].brushSize // 2)
+
+# Prediction ease slider
+def setPredictionEase(ui, percent):
+    ui["canvas"].boostMagnitude = 0.4 * percent
 
 # Unlocks set of buttons
 def unlockButtons(buttons):
@@ -1,60 +1,78 @@
 # Imports
+from src.classes.Dispatcher import Dispatcher
 from src.classes.Button import Button
+from src.classes.Picture import Picture
+from src.classes.Scene import Scene
+from src.classes.Panel import Panel
 
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 import pygame as pg
 
-# Initializes dashboard scene
-def boot(window, settings):
+# Assets used by the scene, preloaded at startup
+ASSETS = [
+    ("image", "media/hiraganaBanner.png", None),
+    ("image", "media/katakanaBanner.png", None),
+    ("image", "media/kanjiBanner.png", None),
+    ("font", "data/latoBlack.ttf", 40),
+]
+
+# Runs trainer scene
+def boot(window, settings, ui):
 
     # Scene variables
-    clock = pg.time.Clock()
-    ui = generateUI(window, settings)
+    busy = False
 
     # Main scene loop
     while True:
 
-        # Event handling
-        position, pressed, released = getMouse(window)
-        for event in pg.event.get():
-
-            # Cross is pressed
-            if event.type == pg.QUIT: return False, ""
-
-            # Mouse button is released
-            if event.type == pg.MOUSEBUTTONUP: released = event.button
+        # Event handling (Blocks while idle)
+        events = window.scheduler.next(busy)
+        with window.profiler.stage("events"):
+            for event in events:
 
-        # Updates window
-        response = handleUI(window, settings, ui, position, pressed, released)
-        if response != None: return response
-        window.update()
-        window.fill((0, 0, 0))
-        clock.tick(120)
-
-# Refreshes mouse information
-def getMouse(window):
+                # Cross is pressed
+                if event.type == pg.QUIT: return False, ""
 
-    # Mouse position
-    position = list(pg.mouse.get_pos())
-    position[0] = position[0] * window.aspectX
-    position[1] = position[1] * window.aspectY
+                # Debug overlay and profiler toggles
+                if event.type == pg.KEYDOWN and event.key == pg.K_F3: window.overlay.toggle()
+                if event.type == pg.KEYDOWN and event.key == pg.K_F2: window.profiler.toggle()
 
-    # Mouse interactivity
-    pressed = pg.mouse.get_pressed()
-    released = 0
+        # Routes input to widgets, which respond through their actions
+        with window.profiler.stage("handleUI"): ui["dispatcher"].dispatch(events)
+        if ui["response"] != None:
+            ui["dispatcher"].reset()
+            return ui["response"]
 
-    return position, pressed, released
+        # Updates window
+        with window.profiler.stage("widgets"): regions = ui["scene"].compose()
+        with window.profiler.stage("present"): window.update(regions)
+        window.profiler.endFrame()
+        busy = ui["dispatcher"].captured is not None
 
 # Generates ui elements
-def generateUI(window, settings):
-
-    return {
-        "canvas": None,
+def generateUI(window, settings, stores):
+
+    ui = {
+        "response": None,
+        "panels": [
+            Panel(window, (0, 0), (666, 1200), *panelColors(settings, "studyHiragana", "highBlue")),
+            Panel(window, (666, 0), (667, 1200), *panelColors(settings, "studyKatakana", "highYellow")),
+            Panel(window, (1333, 0), (667, 1200), *panelColors(settings, "studyKanji", "highRed")),
+            Panel(window, (0, 1075), (2000, 125), settings.get("menuGray2")),
+        ],
+        "images": [
+            Picture(window, (99, 222), window.assets.image("media/hiraganaBanner.png")),
+            Picture(window, (764, 217), window.assets.image("media/katakanaBanner.png")),
+            Picture(window, (1458, 218), window.assets.image("media/kanjiBanner.png")),
+        ],
         "buttons": [
-            Button(window, (0, 0), (666, 1075), drawBackground=False),
-            Button(window, (666, 0), (666, 1075), drawBackground=False),
-            Button(window, (1333, 0), (666, 1075), drawBackground=False),
+            Button(window, (0, 0), (666, 1075), drawBackground=False,
+            action=lambda: toggleStudy(ui, settings, 0, "studyHiragana", "highBlue")),
+            Button(window, (666, 0), (666, 1075), drawBackground=False,
+            action=lambda: toggleStudy(ui, settings, 1, "studyKatakana", "highYellow")),
+            Button(window, (1333, 0), (666, 1075), drawBackground=False,
+            action=lambda: toggleStudy(ui, settings, 2, "studyKanji", "highRed")),
             Button(
                 window,
                 (0, 1075),
@@ -63,93 +81,43 @@ def generateUI(window, settings):
                 drawText=True,
                 textSize=40,
                 text="Start Studying",
-            ),
-        ],
-        "images": [
-            (
-                pg.image.load("media/hiraganaBanner.png").convert_alpha(),
-                (99, 222),
-            ),
-            (
-                pg.image.load("media/katakanaBanner.png").convert_alpha(),
-                (764, 217),
-            ),
-            (
-                pg.image.load("media/kanjiBanner.png").convert_alpha(),
-                (1458, 218),
+                action=lambda: startStudying(ui, settings),
             ),
         ],
     }
 
-# Handles input and visualization
-def handleUI(window, settings, ui, position, pressed, released):
-
-    # Draws hiragana banner background
-    if settings.get("studyHiragana"):
-        linearGradient(window.display, settings.get("highBlue2"), settings.get("highBlue1"), (0, 0, 666, 1200))
-    else: linearGradient(window.display, settings.get("menuGray4"), settings.get("menuGray3"), (0, 0, 666, 1200))
-
-    # Draws katakana banner background
-    if settings.get("studyKatakana"):
-        linearGradient(window.display, settings.get("highYellow2"), settings.get("highYellow1"), (666, 0, 667, 1200))
-    else: linearGradient(window.display, settings.get("menuGray4"), settings.get("menuGray3"), (666, 0, 667, 1200))
-
-    # Draws kanji banner background
-    if settings.get("studyKanji"):
-        linearGradient(window.display, settings.get("highRed2"), settings.get("highRed1"), (1333, 0, 667, 1200))
-    else: linearGradient(window.display, settings.get("menuGray4"), settings.get("menuGray3"), (1333, 0, 667, 1200))
-
-    # Navigation menu background
-    pg.draw.rect(window.display, settings.get("menuGray2"), pg.Rect(0, 1075, 2000, 125))
-
-    # Draws images
-    for image in ui["images"]:
-        window.blit(image[0], image[1])
-
-    # Updates and draws button objects
-    for button in ui["buttons"]: button.update(position, pressed, released)
-    return handleButtons(ui, settings)
-
-
-# Handles button behavior
-def handleButtons(ui, settings):
+    # Widgets are composited in the order they are added
+    ui["scene"] = Scene(window, (0, 0, 0)).add(*ui["panels"], *ui["images"], *ui["buttons"])
+    ui["dispatcher"] = Dispatcher(window, ui["scene"])
+    return ui
 
-    # Hiragana button was pressed
-    if ui["buttons"][0].send:
-        settings.set("studyHiragana", not settings.get("studyHiragana"))
-        settings.save()
+# Resumes scene, syncing it with settings changed elsewhere
+def enter(window, settings, ui):
 
-    # Hiragana button was pressed
-    if ui["buttons"][1].send:
-        settings.set("studyKatakana", not settings.get("studyKatakana"))
-        settings.save()
+    ui["response"] = None
+    ui["panels"][0].setColors(*panelColors(settings, "studyHiragana", "highBlue"))
+    ui["panels"][1].setColors(*panelColors(settings, "studyKatakana", "highYellow"))
+    ui["panels"][2].setColors(*panelColors(settings, "studyKanji", "highRed"))
+    ui["scene"].invalidate()
 
-    # Hiragana button was pressed
-    if ui["buttons"][2].send:
-        settings.set("studyKanji", not settings.get("studyKanji"))
-        settings.save()
+# Toggles a character set when its banner is pressed
+def toggleStudy(ui, settings, index, key, color):
 
-    # Study button was pressed
-    if ui["buttons"][3].send and (settings.get("studyHiragana") or
-    settings.get("studyKatakana") or settings.get("studyKanji")):
-        pg.mouse.set_system_cursor(pg.SYSTEM_CURSOR_ARROW)
-        return True, "dashboard"
+    settings.set(key, not settings.get(key))
+    ui["panels"][index].setColors(*panelColors(settings, key, color))
+    settings.save()
 
-# Draws a linear gradient in the shape of a rect
-def linearGradient(window, startColor, endColor, rect):
+# Study button was pressed
+def startStudying(ui, settings):
 
-    # Fixes rect format
-    if type(rect) in [tuple, list]:
-        rect = pg.Rect(rect)
+    if settings.get("studyHiragana") or settings.get("studyKatakana") or settings.get("studyKanji"):
+        ui["response"] = True, "dashboard"
 
-    # Draws gradient
-    gradient = pg.Surface((2, 2))
-    pg.draw.line(gradient, startColor, (0, 0), (0, 1))
-    pg.draw.line(gradient, endColor, (1, 0), (1, 1))
-    gradient = pg.transform.smoothscale(gradient, (rect.width, rect.height))
+# Picks banner gradient colors based on selection
+def panelColors(settings, key, color):
 
-    # Blits gradient
-    window.blit(gradient, rect)  
+    if settings.get(key): return settings.get(color + "2"), settings.get(color + "1")
+    return settings.get("menuGray4"), settings.get("menuGray3")
 
 # Unlocks set of buttons
 def unlockButtons(buttons):
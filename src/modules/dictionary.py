@@ -429,4 +429,9 @@ N1KANJI_MAP = ['Street', 'Also', 'Hill', 'Rust Colored, Red', 'From', 'This', 'S
 'Whale', 'Dove, Pigeon', 'Chicken', 'Crane', 'Deer', 'Lovely', 'Hemp', 'Shut Up', 'Drum, Beat']
 
 KANJI = [N5KANJI, N4KANJI, N3KANJI, N2KANJI, N1KANJI]
-KANJI_MAP = [N5KANJI_MAP, N4KANJI_MAP, N3KANJI_MAP, N2KANJI_MAP, N1KANJI_MAP]
\ No newline at end of file
+KANJI_MAP = [N5KANJI_MAP, N4KANJI_MAP, N3KANJI_MAP, N2KANJI_MAP, N1KANJI_MAP]
+
+# Studied characters with their set prefix, indexed by character ID (New characters are only ever appended, so
+# saved review state keeps its meaning)
+STUDY_ITEMS = ["HI" + character for character in HIRAGANA] + ["KA" + character for character in KATAKANA] + \
+[f"N{5 - level}" + character for level, kanji in enumerate(KANJI) for character in kanji]